@@ -5,11 +5,14 @@ Implements: Recall → Reason → Tool → Response → Memorize
 """
 
 import asyncio
-import atexit
-from typing import TypedDict, Literal, Optional
-from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import operator
+import string
+from functools import lru_cache
+from typing import Annotated, AsyncIterator, TypedDict, Literal, Optional
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
+from langgraph.graph.message import add_messages
 from langchain_core.messages import (
     HumanMessage,
     AIMessage,
@@ -19,50 +22,78 @@ from langchain_core.messages import (
 )
 
 from utils.llm_factory import get_llm
+from utils.token_budget import count_tokens, truncate_to_tokens
 from tools.memory_tool import retrieve_context, save_interaction
-from tools.web_search import web_search
-from database import get_summary, get_adaptive_context
+from tools.web_search import web_search, is_high_confidence
+from database import get_summary, get_recent_messages_text, classify_query_intent
 from config import config
+import context_cache
+import semantic_cache
 
+logger = logging.getLogger(__name__)
 
-# Thread pool for blocking operations
-_executor = ThreadPoolExecutor(max_workers=10)
 
+# Detached memory-write tasks; tracked so they aren't GC'd mid-flight
+_background_tasks: set[asyncio.Task] = set()
 
-def _cleanup_executor():
-    """Cleanup thread pool on exit."""
-    if _executor is not None:
-        _executor.shutdown(wait=True)
 
+def _spawn_background(coro) -> None:
+    """Schedule a fire-and-forget task and keep a reference until done."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
-# Register cleanup handler
-atexit.register(_cleanup_executor)
+
+def _merge_dicts(a: dict, b: dict) -> dict:
+    """Reducer for context: merge updates from the parallel recall nodes."""
+    return {**a, **b}
 
 
 # ========== Agent State ==========
 
 
 class AgentState(TypedDict):
-    """State passed between nodes in the graph."""
+    """
+    State passed between nodes in the graph.
+    messages uses the add_messages reducer, so nodes return only the new
+    messages instead of spreading/copying the whole state per step.
+    """
 
-    messages: list[BaseMessage]
+    messages: Annotated[list[BaseMessage], add_messages]
     user_input: str
     chat_id: Optional[str]
     user_id: Optional[str]
-    context: dict  # {facts, summary, recent_history}
+    # _merge_dicts reducer: the parallel recall tier nodes each return
+    # their slice and the graph merges them
+    context: Annotated[dict, _merge_dicts]
     final_response: str
-    tool_call_count: int  # Track tool iterations to prevent infinite loops
+    # operator.add reducer: the tools node returns the increment (1)
+    tool_call_count: Annotated[int, operator.add]
+    no_cache: bool  # Bypass the semantic cache for this turn
 
 
-# ========== System Prompt (3-Tier) ==========
+# Backchannel inputs ("ok", "thanks", ...) never yield useful memories -
+# skip the embedder + Qdrant round trip for them
+_BACKCHANNELS = frozenset(
+    {"ok", "okay", "thanks", "thank you", "ty", "yes", "no", "lol",
+     "sure", "cool", "nice", "k", "yep", "nope"}
+)
 
-SYSTEM_PROMPT = """You are MeGPT, a helpful AI assistant with persistent long-term memory and web search capabilities.
 
-[LONG-TERM MEMORY - Facts about the user]
-{memory_facts}
+def _is_recallable(user_input: str) -> bool:
+    """Whether the input is worth a semantic memory lookup."""
+    stripped = user_input.strip().lower().rstrip(".!?")
+    if stripped in _BACKCHANNELS:
+        return False
+    return len(stripped.split()) >= 2
 
-[CONVERSATION SUMMARY]
-{conversation_summary}
+
+# ========== System Prompt (3-Tier) ==========
+
+# Static prelude: identity + guidelines, no placeholders. Kept byte-identical
+# across turns so LLM servers with prefix KV caching (vLLM, LM Studio, ...)
+# can reuse its KV cache instead of re-prefilling it every turn.
+SYSTEM_STATIC = """You are MeGPT, a helpful AI assistant with persistent long-term memory and web search capabilities.
 
 Important facts about yourself:
 - You DO have long-term memory that persists across conversations
@@ -79,49 +110,214 @@ Guidelines:
 
 DO NOT HALLUCINATE DATA. If asked about current prices, news, etc., USE THE WEB SEARCH TOOL."""
 
+# Volatile context: changes every turn, so it lives in its own message AFTER
+# the static prelude to avoid invalidating the cached prefix.
+SYSTEM_VOLATILE_TEMPLATE = """[LONG-TERM MEMORY - Facts about the user]
+{memory_facts}
+
+[CONVERSATION SUMMARY]
+{conversation_summary}"""
+
+
+@lru_cache(maxsize=256)
+def _format_volatile(memory_facts: str, conversation_summary: str) -> str:
+    """Format the volatile system block, memoized by (facts, summary).
+
+    Facts and summary are stable across the turns of a chat, so tool-loop
+    iterations and consecutive turns reuse the already-built string.
+    """
+    return SYSTEM_VOLATILE_TEMPLATE.format(
+        memory_facts=memory_facts, conversation_summary=conversation_summary
+    )
+
+
+# The static prelude never changes, so one shared message object serves
+# every turn; the volatile message is memoized by its (facts, summary) pair
+_STATIC_MESSAGE = SystemMessage(content=SYSTEM_STATIC)
+
+
+@lru_cache(maxsize=128)
+def _volatile_message(memory_facts: str, conversation_summary: str) -> SystemMessage:
+    """Build the volatile SystemMessage, memoized by (facts, summary)."""
+    return SystemMessage(content=_format_volatile(memory_facts, conversation_summary))
+
+
+# Fallback synthesis prompt, compiled once - the static instruction block
+# stays byte-identical across turns (prompt-cache friendly); only the two
+# variables are substituted per call
+SYNTHESIS_TEMPLATE = string.Template("""You are MeGPT. Answer the user based on the Search Results.
+
+CONTEXT:
+User asked: "$user_input"
+
+SEARCH RESULTS:
+$all_results
+
+INSTRUCTIONS:
+1. Synthesize a conversational answer using ONLY the search results.
+2. Use EXACT numbers, prices, and facts - do NOT make up data.
+3. Cite sources (SOURCE 1, SOURCE 2, etc.) when referencing information.
+4. If results don't contain the answer, admit it honestly.
+5. Be concise.""")
+
 
 def create_agent_graph():
     """Create and compile the LangGraph agent."""
 
-    # Get LLM with tools bound
-    llm = get_llm(streaming=False)
+    # Get LLM with tools bound. Streaming client: ainvoke still returns the
+    # full message, but under astream_events the reason/synthesis calls emit
+    # per-token chunks, so run_agent_stream yields real tokens instead of
+    # falling back to the buffered final response.
+    llm = get_llm(streaming=True)
     tools = [web_search]
     llm_with_tools = llm.bind_tools(tools)
 
-    # Tool node for executing tools
-    tool_node = ToolNode(tools)
+    # Tool registry for direct (concurrent) dispatch
+    tools_by_name = {t.name: t for t in tools}
 
-    def recall_node(state: AgentState) -> AgentState:
-        """Node 1: Recall - Fetch adaptive 3-Tier Context based on query intent."""
+    async def cache_check_node(state: AgentState) -> AgentState:
+        """
+        Node 0: Cache check - serve near-duplicate queries straight from the
+        semantic cache. Time-sensitive queries are refused by the cache
+        itself, so realtime questions always take the full path.
+        """
+        if state.get("no_cache"):
+            return {}
+
+        user_input = state.get("user_input", "")
+        user_id = state["user_id"]  # resolved once by the entrypoints
+
+        cached = await asyncio.to_thread(semantic_cache.lookup, user_input, user_id)
+        if cached is not None:
+            logger.debug("Semantic cache hit, skipping the agent loop")
+            return {"final_response": cached}
+        return {}
+
+    def after_cache_check(state: AgentState) -> Literal["hit", "miss"]:
+        """Edge condition: A populated final_response means a cache hit."""
+        return "hit" if state.get("final_response") else "miss"
+
+    # ----- Recall fan-out: each tier is its own node, run in parallel -----
+    # The tiers hit independent backends (Qdrant, SQLite x2, LLM), so the
+    # graph fans out after the dispatcher and joins at assemble_context.
+    # The _merge_dicts reducer on context merges the concurrent updates.
+
+    async def recall_dispatch_node(state: AgentState) -> AgentState:
+        """Node 1: Recall dispatcher - fans out to the parallel tier nodes."""
+        logger.debug("Recall: fanning out tier fetches")
+        return {}
+
+    async def recall_facts_node(state: AgentState) -> AgentState:
+        """Recall tier 2: query-relevant facts from Qdrant."""
         user_input = state.get("user_input", "")
+        user_id = state["user_id"]  # resolved once by the entrypoints
+
+        if not user_input or not _is_recallable(user_input):
+            if user_input:
+                logger.debug("Backchannel input, skipping semantic recall")
+            return {"context": {"facts": ""}}
+
+        try:
+            facts = await asyncio.to_thread(retrieve_context, user_input, user_id)
+        except Exception as e:
+            logger.warning("Facts retrieval failed: %s", e)
+            facts = ""
+        return {"context": {"facts": facts}}
+
+    async def recall_summary_node(state: AgentState) -> AgentState:
+        """Recall tier 3: rolling summary from SQLite (or the TTL bundle)."""
+        chat_id = state.get("chat_id")
+        if not chat_id:
+            return {"context": {"summary": ""}}
+
+        bundle = context_cache.get_bundle(chat_id)
+        if bundle is not None:
+            return {"context": {"summary": bundle["summary"]}}
+
+        try:
+            summary = await asyncio.to_thread(get_summary, chat_id)
+        except Exception as e:
+            logger.warning("Summary fetch failed: %s", e)
+            summary = ""
+        return {"context": {"summary": summary}}
+
+    async def recall_history_node(state: AgentState) -> AgentState:
+        """Recall tier 1: recent messages from SQLite (or the TTL bundle)."""
         chat_id = state.get("chat_id")
-        user_id = state.get("user_id") or config.user_id
+        if not chat_id:
+            return {"context": {"recent_history": ""}}
 
-        print("🧠 Recall node: Fetching adaptive context...")
+        bundle = context_cache.get_bundle(chat_id)
+        if bundle is not None:
+            return {"context": {"recent_history": bundle["recent"]}}
 
         try:
-            # Use LLM-based intent classification for smart tier selection
-            adaptive_result = get_adaptive_context(user_input, chat_id, user_id)
-            
-            facts = adaptive_result.get("facts", "")
-            summary = adaptive_result.get("summary", "")
-            recent_history = adaptive_result.get("recent", "")
-            intent = adaptive_result.get("intent", "general")
-            
-            print(f"  Intent: {intent}")
-            print(f"  Tier 2 (Facts): {len(facts)} chars")
-            print(f"  Tier 3 (Summary): {len(summary)} chars")
-            print(f"  Tier 1 (Recent): {len(recent_history)} chars")
-            
+            recent = await asyncio.to_thread(get_recent_messages_text, chat_id, 10)
         except Exception as e:
-            print(f"⚠ Adaptive context failed, using fallback: {e}")
-            # Fallback to basic context fetching
-            facts = retrieve_context(user_input, user_id) if user_input else ""
-            summary = get_summary(chat_id) if chat_id else ""
+            logger.warning("Recent history fetch failed: %s", e)
+            recent = ""
+        return {"context": {"recent_history": recent}}
+
+    async def recall_intent_node(state: AgentState) -> AgentState:
+        """Recall: classify intent for the adaptive trim in assemble_context."""
+        user_input = state.get("user_input", "")
+        if not user_input:
+            return {"context": {"intent": "general", "needs_history": True}}
+
+        # classify_query_intent degrades to the general bucket on failure
+        result = await asyncio.to_thread(classify_query_intent, user_input)
+        return {
+            "context": {
+                "intent": result.get("intent", "general"),
+                "needs_history": result.get("needs_history", True),
+            }
+        }
+
+    async def assemble_context_node(state: AgentState) -> AgentState:
+        """Join node: adaptive tier selection + token budgets on merged tiers."""
+        context = state.get("context", {})
+        chat_id = state.get("chat_id")
+
+        facts = context.get("facts", "")
+        summary = context.get("summary", "")
+        recent_history = context.get("recent_history", "")
+        intent = context.get("intent", "general")
+        needs_history = context.get("needs_history", True)
+
+        # Cache the raw (untrimmed) tiers for the next turns in this chat
+        if chat_id and context_cache.get_bundle(chat_id) is None:
+            context_cache.set_bundle(chat_id, summary, recent_history)
+
+        # Adaptive tier selection (same policy as get_adaptive_context),
+        # applied after the parallel fetches instead of gating them
+        if intent == "followup":
+            summary = ""
+        elif intent == "factual":
+            summary = summary if needs_history else ""
             recent_history = ""
+        elif intent == "new_topic":
+            summary = ""
+            recent_history = ""
+
+        # Bound each tier so prefill cost stays O(budget), not O(history):
+        # keep the newest tail of the chronological history, the head of
+        # facts/summary (most relevant facts rank first)
+        facts = truncate_to_tokens(facts, config.max_facts_tokens, keep="head")
+        summary = truncate_to_tokens(summary, config.max_summary_tokens, keep="head")
+        recent_history = truncate_to_tokens(
+            recent_history, config.max_recent_tokens, keep="tail"
+        )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Recall done: intent=%s facts=%d summary=%d recent=%d chars",
+                intent,
+                len(facts),
+                len(summary),
+                len(recent_history),
+            )
 
         return {
-            **state,
             "context": {
                 "facts": facts,
                 "summary": summary,
@@ -129,7 +325,7 @@ def create_agent_graph():
             },
         }
 
-    def reason_node(state: AgentState) -> AgentState:
+    async def reason_node(state: AgentState) -> AgentState:
         """Node 2: Reason - LLM decides response or tool use."""
         context = state.get("context", {})
         messages = state.get("messages", [])
@@ -140,10 +336,8 @@ def create_agent_graph():
         summary = context.get("summary", "") or "No summary yet."
         recent_history_str = context.get("recent_history", "")
 
-        # Build comprehensive system prompt
-        system_content = SYSTEM_PROMPT.format(
-            memory_facts=facts, conversation_summary=summary
-        )
+        # Volatile context goes in its own message after the static prelude
+        volatile_message = _volatile_message(facts, summary)
 
         # Inject DB history as a context refresh
         # This ensures the LLM sees messages that might have been truncated by the server
@@ -156,36 +350,48 @@ RECENT CONVERSATION HISTORY (from database):
         else:
             context_refresh = ""
 
-        # Get current input (last message from state)
-        current_input = messages[-1] if messages else HumanMessage(content="")
-
         # Construct the full message sequence:
-        # 1. System: Core instructions + Facts + Summary
-        # 2. System: Recent history dump (fills the gap)
-        # 3. Human: Current input
-        full_messages = [SystemMessage(content=system_content)]
+        # 1. System: Static core instructions (cacheable prefix)
+        # 2. System: Volatile Facts + Summary
+        # 3. System: Recent history dump (fills the gap)
+        # 4. The running turn: user input, tool calls, tool results
+        # Keeping the prefix identical across tool-loop iterations makes the
+        # post-tool call a continuation of the same conversation (prefix-cache
+        # friendly) instead of a fresh synthesis prompt, so the answer after a
+        # tool run comes from this single LLM call.
+        full_messages = [
+            _STATIC_MESSAGE,
+            volatile_message,
+        ]
 
         if context_refresh:
             full_messages.append(SystemMessage(content=context_refresh))
 
-        full_messages.append(current_input)
+        if messages:
+            full_messages.extend(messages)
+        else:
+            full_messages.append(HumanMessage(content=""))
 
-        print(
-            f"Thought Reason node: Invoking LLM with comprehensive context (DB history: {len(recent_history_str)} chars)..."
+        logger.debug(
+            "Reason node: invoking LLM (DB history: %d chars)",
+            len(recent_history_str),
         )
 
-        # Get LLM response (may include tool_calls)
-        response = llm_with_tools.invoke(full_messages)
+        # Get LLM response (may include tool_calls) without blocking the loop
+        response = await llm_with_tools.ainvoke(full_messages)
 
         # Debug: Check for tool calls
         if hasattr(response, "tool_calls") and response.tool_calls:
-            print(
-                f"Tool calls detected: {[tc.get('name') for tc in response.tool_calls]}"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Tool calls detected: %s",
+                    [tc.get("name") for tc in response.tool_calls],
+                )
         else:
-            print("Text response (no tools)")
+            logger.debug("Text response (no tools)")
 
-        return {**state, "messages": messages + [response]}
+        # add_messages reducer appends - no list concatenation needed
+        return {"messages": [response]}
 
     def should_continue(state: AgentState) -> Literal["tools", "respond"]:
         """Edge condition: Check if we need to call tools."""
@@ -198,8 +404,8 @@ RECENT CONVERSATION HISTORY (from database):
 
         # Prevent infinite tool loops
         if tool_count >= MAX_TOOL_CALLS:
-            print(
-                f"Warning: Max tool calls ({MAX_TOOL_CALLS}) reached, forcing response..."
+            logger.warning(
+                "Max tool calls (%d) reached, forcing response", MAX_TOOL_CALLS
             )
             return "respond"
 
@@ -210,77 +416,122 @@ RECENT CONVERSATION HISTORY (from database):
             return "tools"
         return "respond"
 
-    def tools_wrapper_node(state: AgentState) -> AgentState:
-        """Wrapper around ToolNode that properly accumulates messages."""
-        tool_result = tool_node.invoke(state)
-        new_messages = tool_result.get("messages", [])
+    async def _run_tool_call(name: str, args: dict) -> str:
+        """Execute one tool call, returning an error string on failure."""
+        tool_fn = tools_by_name.get(name)
+        if tool_fn is None:
+            return f"Error: unknown tool '{name}'"
+        try:
+            result = await tool_fn.ainvoke(args)
+            return str(result)
+        except Exception as e:
+            return f"Error executing {name}: {e}"
+
+    async def tools_wrapper_node(state: AgentState) -> AgentState:
+        """
+        Node 3: Tools - Execute the requested tool calls concurrently.
+        Identical (name, args) calls are deduplicated and share one
+        execution; the result is broadcast to every duplicate call id.
+        """
+        messages = state.get("messages", [])
+        last_message = messages[-1] if messages else None
+        tool_calls = getattr(last_message, "tool_calls", None) or []
+
+        # Dedup identical calls before dispatch
+        unique_calls: dict[str, tuple[str, dict]] = {}
+        call_keys = []
+        for tc in tool_calls:
+            key = f"{tc.get('name')}:{json.dumps(tc.get('args', {}), sort_keys=True)}"
+            call_keys.append(key)
+            unique_calls.setdefault(key, (tc.get("name"), tc.get("args", {})))
+
+        results = await asyncio.gather(
+            *(_run_tool_call(name, args) for name, args in unique_calls.values())
+        )
+        results_by_key = dict(zip(unique_calls.keys(), results))
 
-        # CRITICAL: Append new messages to existing, don't overwrite!
-        all_messages = state.get("messages", []) + new_messages
+        new_messages = [
+            ToolMessage(
+                content=results_by_key[key],
+                name=tc.get("name"),
+                tool_call_id=tc.get("id"),
+            )
+            for tc, key in zip(tool_calls, call_keys)
+        ]
 
-        print(
-            f"   Tool executed, added {len(new_messages)} messages, total: {len(all_messages)}"
+        logger.debug(
+            "Executed %d unique tool call(s) for %d request(s)",
+            len(unique_calls),
+            len(tool_calls),
         )
 
+        # add_messages reducer appends the new ToolMessages
         return {
-            **state,
-            "messages": all_messages,
-            "tool_call_count": state.get("tool_call_count", 0) + 1,
+            "messages": new_messages,
+            "tool_call_count": 1,
         }
 
-    def respond_node(state: AgentState) -> AgentState:
+    def after_tools(state: AgentState) -> Literal["reason", "respond"]:
+        """
+        Edge condition: Skip re-invoking the reason LLM when the tool output
+        already looks conclusive - respond_node synthesizes from it directly,
+        preventing further tool iterations.
+        """
+        messages = state.get("messages", [])
+        last_message = messages[-1] if messages else None
+
+        if isinstance(last_message, ToolMessage) and is_high_confidence(
+            str(last_message.content)
+        ):
+            logger.debug("Tool result looks conclusive, short-circuiting to respond")
+            return "respond"
+        return "reason"
+
+    async def respond_node(state: AgentState) -> AgentState:
         """Node 4: Synthesize final response with Context Hygiene."""
         messages = state.get("messages", [])
         user_input = state.get("user_input", "")
 
-        print(f"[RESPOND] Processing {len(messages)} messages")
+        logger.debug("Respond node: processing %d messages", len(messages))
 
         if messages:
             last_message = messages[-1]
 
-            # If we have an AIMessage with content, use it directly
+            # Normal path: the reason loop already synthesized the answer
+            # (tool results were fed back as a continuation turn), so just
+            # return its content - no extra LLM call
             if isinstance(last_message, AIMessage) and last_message.content:
-                print(
-                    f"   Using last AIMessage content ({len(last_message.content)} chars)"
+                logger.debug(
+                    "Using last AIMessage content (%d chars)",
+                    len(last_message.content),
                 )
-                return {**state, "final_response": last_message.content}
+                return {"final_response": last_message.content}
 
-            # Collect tool results for synthesis
+            # Fallback: reason loop exited without usable content
+            # (e.g. max tool calls hit) - synthesize from raw tool results.
+            # Single pass: collect tool results and the clean history
+            # (CONTEXT HYGIENE - keep user messages and AI text responses,
+            # drop SystemMessages, ToolMessages, and empty AIMessages)
             tool_results = []
-            for msg in messages:
-                if isinstance(msg, ToolMessage):
-                    tool_results.append(msg.content)
-
-            print(f"   Found {len(tool_results)} tool results")
+            clean_history = []
+            for m in messages:
+                msg_type = type(m)
+                if msg_type is ToolMessage:
+                    tool_results.append(m.content)
+                elif msg_type is HumanMessage:
+                    clean_history.append(m)
+                elif msg_type is AIMessage and m.content:
+                    clean_history.append(m)
+
+            logger.debug("Found %d tool results", len(tool_results))
 
             if tool_results:
                 all_results = "\n\n---\n\n".join(tool_results)
 
-                # CONTEXT HYGIENE: Create a clean history for the LLM
-                # Keep: User messages, AI text responses (summaries)
-                # Remove: SystemMessages, ToolMessages, empty AIMessages
-                clean_history = []
-                for m in messages:
-                    if isinstance(m, HumanMessage):
-                        clean_history.append(m)
-                    elif isinstance(m, AIMessage) and m.content:
-                        clean_history.append(m)
-
-                # Build synthesis prompt
-                synthesis_prompt = f"""You are MeGPT. Answer the user based on the Search Results.
-
-CONTEXT:
-User asked: "{user_input}"
-
-SEARCH RESULTS:
-{all_results}
-
-INSTRUCTIONS:
-1. Synthesize a conversational answer using ONLY the search results.
-2. Use EXACT numbers, prices, and facts - do NOT make up data.
-3. Cite sources (SOURCE 1, SOURCE 2, etc.) when referencing information.
-4. If results don't contain the answer, admit it honestly.
-5. Be concise."""
+                # Build synthesis prompt from the precompiled template
+                synthesis_prompt = SYNTHESIS_TEMPLATE.substitute(
+                    user_input=user_input, all_results=all_results
+                )
 
                 synthesis_messages = [
                     SystemMessage(content="You are a helpful AI assistant."),
@@ -288,56 +539,86 @@ INSTRUCTIONS:
                     HumanMessage(content=synthesis_prompt),
                 ]
 
-                print(
-                    f"Synthesizing with {len(clean_history)} clean history messages..."
+                logger.debug(
+                    "Synthesizing with %d clean history messages",
+                    len(clean_history),
                 )
 
-                llm = get_llm()
-                response = llm.invoke(synthesis_messages)
+                response = await llm.ainvoke(synthesis_messages)
 
-                print(f"   Synthesis complete: {len(response.content)} chars")
-                return {**state, "final_response": response.content}
+                logger.debug("Synthesis complete: %d chars", len(response.content))
+                return {"final_response": response.content}
 
         return {
-            **state,
             "final_response": "I couldn't find any information to help with that.",
         }
 
-    def memorize_node(state: AgentState) -> AgentState:
+    async def memorize_node(state: AgentState) -> AgentState:
         """Node 5: Save interaction to memory."""
         user_input = state.get("user_input", "")
         final_response = state.get("final_response", "")
-        user_id = state.get("user_id") or config.user_id
+        user_id = state["user_id"]  # resolved once by the entrypoints
         chat_id = state.get("chat_id")
 
         if user_input and final_response:
-            try:
-                save_interaction(user_input, final_response, user_id, chat_id)
-                print("Saved interaction to memory")
-            except Exception as e:
-                print(f"Warning: Failed to save to memory: {e}")
+            # Fire-and-forget: the user doesn't need to wait for the memory
+            # write or the cache feed, so take them off the response path.
+            # save_interaction and semantic_cache.store already swallow and
+            # log their own failures.
+            _spawn_background(
+                asyncio.to_thread(
+                    save_interaction, user_input, final_response, user_id, chat_id
+                )
+            )
+            _spawn_background(
+                asyncio.to_thread(
+                    semantic_cache.store, user_input, final_response, user_id
+                )
+            )
+            logger.debug("Scheduled memory save in background")
 
-        return state
+        return {}
 
     # Build the graph
     workflow = StateGraph(AgentState)
 
     # Add nodes
-    workflow.add_node("recall", recall_node)
+    workflow.add_node("cache_check", cache_check_node)
+    workflow.add_node("recall", recall_dispatch_node)
+    workflow.add_node("recall_facts", recall_facts_node)
+    workflow.add_node("recall_summary", recall_summary_node)
+    workflow.add_node("recall_history", recall_history_node)
+    workflow.add_node("recall_intent", recall_intent_node)
+    workflow.add_node("assemble_context", assemble_context_node)
     workflow.add_node("reason", reason_node)
     workflow.add_node("tools", tools_wrapper_node)
     workflow.add_node("respond", respond_node)
     workflow.add_node("memorize", memorize_node)
 
     # Set entry point
-    workflow.set_entry_point("recall")
+    workflow.set_entry_point("cache_check")
 
     # Add edges
-    workflow.add_edge("recall", "reason")
+    workflow.add_conditional_edges(
+        "cache_check", after_cache_check, {"hit": END, "miss": "recall"}
+    )
+    # Fan out the independent tier fetches, join at assemble_context
+    workflow.add_edge("recall", "recall_facts")
+    workflow.add_edge("recall", "recall_summary")
+    workflow.add_edge("recall", "recall_history")
+    workflow.add_edge("recall", "recall_intent")
+    workflow.add_edge(
+        ["recall_facts", "recall_summary", "recall_history", "recall_intent"],
+        "assemble_context",
+    )
+    workflow.add_edge("assemble_context", "reason")
     workflow.add_conditional_edges(
         "reason", should_continue, {"tools": "tools", "respond": "respond"}
     )
-    workflow.add_edge("tools", "reason")  # Loop back after tool execution
+    # Loop back after tool execution, unless the result is already conclusive
+    workflow.add_conditional_edges(
+        "tools", after_tools, {"reason": "reason", "respond": "respond"}
+    )
     workflow.add_edge("respond", "memorize")
     workflow.add_edge("memorize", END)
 
@@ -345,8 +626,18 @@ INSTRUCTIONS:
     return workflow.compile()
 
 
-# Create the agent instance
-agent = create_agent_graph()
+# Lazy singleton: compiling the graph builds the LLM client and binds
+# tools - defer it so importing this module stays cheap (CLI --help,
+# test collection, server startup)
+_AGENT = None
+
+
+def get_agent():
+    """Get the compiled agent graph, building it on first use."""
+    global _AGENT
+    if _AGENT is None:
+        _AGENT = create_agent_graph()
+    return _AGENT
 
 
 def run_agent(
@@ -356,12 +647,39 @@ def run_agent(
     user_id: str | None = None,
 ) -> str:
     """
-    Run the agent synchronously (for testing).
+    Run the agent synchronously (for CLI/testing).
+    Thin wrapper around run_agent_async - the graph contains async nodes,
+    so it must be driven through ainvoke.
+    """
+
+    async def _run_and_flush() -> str:
+        response = await run_agent_async(user_input, history, chat_id, user_id)
+        # asyncio.run cancels pending tasks on teardown - flush the detached
+        # memory writes so the CLI path doesn't lose them
+        if _background_tasks:
+            await asyncio.gather(*_background_tasks, return_exceptions=True)
+        return response
+
+    return asyncio.run(_run_and_flush())
+
+
+async def run_agent_async(
+    user_input: str,
+    history: list[BaseMessage] | None = None,
+    chat_id: str | None = None,
+    user_id: str | None = None,
+    no_cache: bool = False,
+) -> str:
+    """
+    Run the agent asynchronously (for FastAPI).
+    Uses ainvoke for non-blocking execution.
+    The graph's cache_check node serves near-duplicate queries from the
+    semantic cache (pass no_cache=True to force the full path).
     """
     messages = history or []
     messages.append(HumanMessage(content=user_input))
 
-    result = agent.invoke(
+    result = await get_agent().ainvoke(
         {
             "messages": messages,
             "user_input": user_input,
@@ -370,26 +688,71 @@ def run_agent(
             "context": {},
             "final_response": "",
             "tool_call_count": 0,
+            "no_cache": no_cache,
         }
     )
 
     return result.get("final_response", "I couldn't generate a response.")
 
 
-async def run_agent_async(
-    user_input: str,
+async def run_agent_batch(
+    user_inputs: list[str],
     history: list[BaseMessage] | None = None,
     chat_id: str | None = None,
     user_id: str | None = None,
 ) -> str:
     """
-    Run the agent asynchronously (for FastAPI).
-    Uses ainvoke for non-blocking execution.
+    Run the agent once over a burst of queued messages.
+    Coalesces N pending messages into a single delimited prompt so one
+    recall/reason/respond cycle covers all of them instead of N full
+    cycles. Falls back to sequential runs when coalescing is disabled,
+    or when the combined text would blow the context budget.
+    """
+    if not user_inputs:
+        return ""
+
+    if len(user_inputs) == 1:
+        return await run_agent_async(user_inputs[0], history, chat_id, user_id)
+
+    combined = "\n\n".join(
+        f"--- Message {i} of {len(user_inputs)} ---\n{text}"
+        for i, text in enumerate(user_inputs, 1)
+    )
+    combined += "\n\nPlease address each message above in order."
+
+    budget = config.context_window_size // 2
+    if config.allow_message_coalescing and count_tokens(combined) <= budget:
+        return await run_agent_async(combined, history, chat_id, user_id)
+
+    # Too large (or disabled): process sequentially, sharing the history
+    messages = history or []
+    response = ""
+    for text in user_inputs:
+        response = await run_agent_async(text, messages, chat_id, user_id)
+        messages.append(AIMessage(content=response))
+    return response
+
+
+async def run_agent_stream(
+    user_input: str,
+    history: list[BaseMessage] | None = None,
+    chat_id: str | None = None,
+    user_id: str | None = None,
+    no_cache: bool = False,
+) -> AsyncIterator[str]:
+    """
+    Run the agent and yield response text chunks as the LLM generates them.
+    Cuts perceived latency to time-to-first-token instead of full-response
+    time. memorize_node still receives the complete text inside the graph;
+    cache hits resolve in the graph's cache_check node.
     """
     messages = history or []
     messages.append(HumanMessage(content=user_input))
 
-    result = await agent.ainvoke(
+    streamed_any = False
+    final_response = ""
+
+    async for event in get_agent().astream_events(
         {
             "messages": messages,
             "user_input": user_input,
@@ -398,7 +761,25 @@ async def run_agent_async(
             "context": {},
             "final_response": "",
             "tool_call_count": 0,
-        }
-    )
-
-    return result.get("final_response", "I couldn't generate a response.")
+            "no_cache": no_cache,
+        },
+        version="v2",
+    ):
+        kind = event.get("event")
+
+        if kind == "on_chat_model_stream":
+            chunk = event.get("data", {}).get("chunk")
+            content = getattr(chunk, "content", "")
+            # Tool-call deltas carry no text content and are skipped here
+            if content:
+                streamed_any = True
+                yield content
+
+        elif kind == "on_chain_end" and event.get("name") == "LangGraph":
+            output = event.get("data", {}).get("output") or {}
+            if isinstance(output, dict):
+                final_response = output.get("final_response", "")
+
+    # Fallback for models/paths that didn't emit token chunks
+    if not streamed_any and final_response:
+        yield final_response
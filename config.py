@@ -6,6 +6,7 @@ Phase 4: Added ENV_MODE, data paths, and backup configuration.
 
 import os
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
@@ -29,17 +30,40 @@ class Config:
         os.getenv("CONTEXT_WINDOW_SIZE", "4096")
     )  # Context window in tokens
 
+    # ========== Context Tier Token Budgets ==========
+    # Per-tier caps injected into the prompt; 0 disables truncation
+    max_recent_tokens: int = int(os.getenv("MAX_RECENT_TOKENS", "1500"))
+    max_facts_tokens: int = int(os.getenv("MAX_FACTS_TOKENS", "600"))
+    max_summary_tokens: int = int(os.getenv("MAX_SUMMARY_TOKENS", "400"))
+
     # ========== Embedder Settings ==========
     embedder_base_url: str = os.getenv("EMBEDDER_BASE_URL", "http://localhost:1234/v1")
     embedder_api_key: str = os.getenv("EMBEDDER_API_KEY", "lm-studio")
     embedder_model_name: str = os.getenv("EMBEDDER_MODEL_NAME", "text-embedding-bge-m3")
+    # Vector dimension of the embedder; 0 = probe the model once and
+    # cache the detected value on disk
+    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "0"))
 
     # ========== Qdrant Settings ==========
     qdrant_host: str = os.getenv("QDRANT_HOST", "localhost")
     qdrant_port: int = int(os.getenv("QDRANT_PORT", "6333"))
+    qdrant_grpc_port: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    # "binary" stores 1-bit vectors in RAM (32x smaller, popcount search);
+    # "scalar" stores int8 vectors (4x smaller, better pre-rescore recall);
+    # "none" keeps plain float32 vectors
+    qdrant_quantization: str = os.getenv("QDRANT_QUANTIZATION", "binary")
 
     # ========== Feature Flags ==========
     enable_web_search: bool = os.getenv("ENABLE_WEB_SEARCH", "true").lower() == "true"
+    # Merge bursty queued messages into a single agent cycle
+    allow_message_coalescing: bool = (
+        os.getenv("ALLOW_MESSAGE_COALESCING", "true").lower() == "true"
+    )
+
+    # ========== Server ==========
+    # Uvicorn worker processes; >1 scales CPU-bound JSON/context work
+    # across cores (per-process caches and counters stay per-worker)
+    server_workers: int = int(os.getenv("SERVER_WORKERS", "1"))
 
     # ========== User Identity ==========
     user_id: str = os.getenv("USER_ID", "default_user")
@@ -49,6 +73,10 @@ class Config:
         "API_KEY", None
     )  # Optional API key for access control
 
+    # ========== Database ==========
+    # Optional override; ":memory:" runs fully in RAM (tests, bulk imports)
+    db_path_override: str = os.getenv("DB_PATH", "")
+
     # ========== Backup Settings ==========
     backup_interval_hours: int = int(
         os.getenv("BACKUP_INTERVAL_HOURS", "0")
@@ -59,27 +87,31 @@ class Config:
     )
 
     # ========== Computed Paths (Environment-Aware) ==========
-    @property
+    # cached_property: env_mode is fixed for the process lifetime, so each
+    # value is computed once instead of rebuilding Path objects per access
+    @cached_property
     def data_dir(self) -> Path:
         """Data directory based on environment mode."""
         return Path(__file__).parent / "data" / self.env_mode
 
-    @property
+    @cached_property
     def db_path(self) -> Path:
         """SQLite database path."""
+        if self.db_path_override:
+            return Path(self.db_path_override)
         return self.data_dir / "megpt.db"
 
-    @property
+    @cached_property
     def backups_dir(self) -> Path:
         """Backups directory."""
         return self.data_dir / "backups"
 
-    @property
+    @cached_property
     def qdrant_collection(self) -> str:
         """Qdrant collection name based on environment."""
         return f"megpt_memories_{self.env_mode}"
 
-    @property
+    @cached_property
     def is_production(self) -> bool:
         """Check if running in production mode."""
         return self.env_mode == "prod"
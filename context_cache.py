@@ -0,0 +1,51 @@
+"""
+Context Cache - Process-local TTL cache for per-chat context tiers.
+The rolling summary and recent-history tiers only change when the chat
+changes, so repeated turns within a short window can reuse the last
+fetch instead of paying two SQLite round trips per turn.
+"""
+
+import time
+from threading import Lock
+from typing import Optional
+
+BUNDLE_TTL_SECONDS = 30.0
+
+_lock = Lock()
+_bundles: dict[str, tuple[float, dict]] = {}
+
+
+def get_bundle(chat_id: str) -> Optional[dict]:
+    """Get the cached {summary, recent} bundle for a chat, or None."""
+    if not chat_id:
+        return None
+
+    with _lock:
+        entry = _bundles.get(chat_id)
+        if entry is None:
+            return None
+
+        ts, bundle = entry
+        if time.monotonic() - ts > BUNDLE_TTL_SECONDS:
+            del _bundles[chat_id]
+            return None
+
+        return bundle
+
+
+def set_bundle(chat_id: str, summary: str, recent: str) -> None:
+    """Cache the freshly fetched tiers for a chat."""
+    if not chat_id:
+        return
+
+    with _lock:
+        _bundles[chat_id] = (time.monotonic(), {"summary": summary, "recent": recent})
+
+
+def invalidate(chat_id: Optional[str] = None) -> None:
+    """Drop the bundle for one chat, or all bundles if chat_id is None."""
+    with _lock:
+        if chat_id is None:
+            _bundles.clear()
+        else:
+            _bundles.pop(chat_id, None)
@@ -2,41 +2,205 @@
 Database Layer - SQLite with FTS5, WAL mode, and Phase 3 summary support.
 Phase 4: Environment-aware database paths.
 """
-import json
+import atexit
+import re
 import sqlite3
+import threading
+import time
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from contextlib import contextmanager
 from typing import Optional
 
 import httpx
+import orjson
 
 from config import config
+import context_cache
+
+
+def _now_ms() -> int:
+    """Current time as integer milliseconds since the epoch."""
+    return int(time.time() * 1000)
+
+
+def _is_memory_db() -> bool:
+    """Whether the configured database lives in RAM (DB_PATH=:memory:)."""
+    return config.db_path_override == ":memory:"
 
 
 def get_db_path() -> Path:
     """Ensure data directory exists and return DB path."""
-    config.data_dir.mkdir(parents=True, exist_ok=True)
+    if not _is_memory_db():
+        config.data_dir.mkdir(parents=True, exist_ok=True)
     return config.db_path
 
 
+# One connection per thread, opened lazily and kept for the thread's
+# lifetime - avoids the file-open + PRAGMA round trip on every query
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pooled_connections: list[sqlite3.Connection] = []
+
+
+def _get_thread_connection() -> sqlite3.Connection:
+    """Get (or open) this thread's long-lived connection."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        if _is_memory_db():
+            # Shared-cache URI so every thread sees the same in-memory DB
+            conn = sqlite3.connect(
+                "file:megpt_mem?mode=memory&cache=shared",
+                uri=True,
+                cached_statements=512,
+            )
+        else:
+            conn = sqlite3.connect(get_db_path(), cached_statements=512)
+        conn.row_factory = sqlite3.Row
+        # CRITICAL: Enable Write-Ahead Logging to allow simultaneous Read/Write
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL-safe throughput set, applied once per pooled connection:
+        # NORMAL skips the fsync-per-commit (safe under WAL), mmap serves
+        # reads from the page cache, 64MiB cache covers the FTS index, temp
+        # b-trees stay in RAM, and busy_timeout rides out writer contention
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA foreign_keys = ON")
+        _local.conn = conn
+        with _pool_lock:
+            _pooled_connections.append(conn)
+    return conn
+
+
+def _close_pooled_connections() -> None:
+    """Close every pooled connection at interpreter exit."""
+    with _pool_lock:
+        for conn in _pooled_connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        _pooled_connections.clear()
+
+
+atexit.register(_close_pooled_connections)
+
+
+# Lazy schema init: first real query pays for it once per process; a
+# sentinel file short-circuits the CREATE/ALTER/trigger no-op churn on
+# warm databases entirely
+_SCHEMA_SENTINEL_NAME = ".schema_v2"
+_schema_initialized = False
+_schema_lock = threading.Lock()
+
+
+def _ensure_schema() -> None:
+    """Run init_db once per process unless the sentinel says it's done."""
+    global _schema_initialized
+    if _schema_initialized:
+        return
+    with _schema_lock:
+        if _schema_initialized:
+            return
+        # Flag first: init_db goes through get_connection itself
+        _schema_initialized = True
+        if _is_memory_db():
+            init_db()
+            return
+        sentinel = config.data_dir / _SCHEMA_SENTINEL_NAME
+        if sentinel.exists() and config.db_path.exists():
+            return
+        init_db()
+        try:
+            sentinel.touch()
+        except OSError:
+            pass
+
+
 @contextmanager
 def get_connection():
-    """Context manager for database connections with WAL mode."""
-    conn = sqlite3.connect(get_db_path())
-    conn.row_factory = sqlite3.Row
-    # CRITICAL: Enable Write-Ahead Logging to allow simultaneous Read/Write
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys = ON")
+    """Context manager yielding the thread-local connection with WAL mode."""
+    _ensure_schema()
+    conn = _get_thread_connection()
     try:
         yield conn
         conn.commit()
     except Exception:
         conn.rollback()
         raise
-    finally:
-        conn.close()
+
+
+# ========== Statement Catalog ==========
+# Hot-path SQL lives here as module constants: every call site passes the
+# identical string object, so the per-connection prepared-statement cache
+# (cached_statements above) hits deterministically instead of re-parsing.
+
+_SQL_INSERT_CHAT = (
+    "INSERT INTO chats (id, user_id, title, summary, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+# Slim projection for list views: skips the unbounded summary blob so the
+# chat list serializes a few small fields per row
+_SQL_GET_CHATS = (
+    "SELECT id, user_id, title, created_at, updated_at, message_count "
+    "FROM chats WHERE user_id = ? ORDER BY updated_at DESC"
+)
+_SQL_GET_CHAT = "SELECT * FROM chats WHERE id = ?"
+_SQL_UPDATE_CHAT_TITLE = "UPDATE chats SET title = ?, updated_at = ? WHERE id = ?"
+_SQL_DELETE_CHAT = "DELETE FROM chats WHERE id = ?"
+_SQL_GET_SUMMARY = "SELECT summary FROM chats WHERE id = ?"
+_SQL_UPDATE_SUMMARY = "UPDATE chats SET summary = ?, updated_at = ? WHERE id = ?"
+_SQL_GET_SUMMARY_STATE = "SELECT summary, summary_last_msg_id FROM chats WHERE id = ?"
+_SQL_UPDATE_SUMMARY_STATE = (
+    "UPDATE chats SET summary = ?, summary_last_msg_id = ?, updated_at = ?"
+    " WHERE id = ?"
+)
+_SQL_GET_NEW_MESSAGES_TEXT = (
+    "SELECT group_concat(line, char(10)) AS text, max(mid) AS last_id FROM ("
+    "    SELECT upper(role) || ': ' || content AS line, id AS mid"
+    "    FROM (SELECT id, role, content FROM messages"
+    "          WHERE chat_id = ? AND id > ? ORDER BY id DESC LIMIT ?)"
+    "    ORDER BY id ASC LIMIT -1"  # chronological; LIMIT blocks flattening
+    ")"
+)
+_SQL_GET_MESSAGE_COUNT = "SELECT message_count FROM chats WHERE id = ?"
+_SQL_INSERT_MESSAGE = (
+    "INSERT INTO messages (chat_id, role, content, created_at) VALUES (?, ?, ?, ?)"
+)
+_SQL_TOUCH_CHAT = "UPDATE chats SET updated_at = ? WHERE id = ?"
+_SQL_GET_RECENT_MESSAGES_TEXT = (
+    "SELECT group_concat(line, char(10)) AS text FROM ("
+    "    SELECT upper(role) || ': ' || content AS line"
+    "    FROM (SELECT id, role, content FROM messages"
+    "          WHERE chat_id = ? ORDER BY created_at DESC, id DESC LIMIT ?)"
+    "    ORDER BY id ASC LIMIT -1"  # id tie-breaks same-ms timestamps;
+    ")"                             # LIMIT blocks subquery flattening
+)
+_SQL_GET_MESSAGES_DESC = (
+    "SELECT * FROM messages WHERE chat_id = ? ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+_SQL_GET_MESSAGES_ASC = (
+    "SELECT * FROM messages WHERE chat_id = ? ORDER BY created_at ASC, id ASC"
+)
+
+
+def run_maintenance() -> None:
+    """
+    Checkpoint the WAL and refresh planner statistics.
+    Keeps the WAL file from growing until an automatic checkpoint stalls a
+    COMMIT, and keeps query plans current for long-running sessions.
+    """
+    try:
+        conn = _get_thread_connection()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA optimize")
+    except Exception as e:
+        print(f"⚠ DB maintenance failed: {e}")
 
 
 def init_db():
@@ -49,8 +213,8 @@ def init_db():
                 user_id TEXT NOT NULL,
                 title TEXT,
                 summary TEXT DEFAULT '',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                created_at INTEGER DEFAULT (CAST(strftime('%s','now') AS INTEGER)*1000),
+                updated_at INTEGER DEFAULT (CAST(strftime('%s','now') AS INTEGER)*1000)
             )
         """)
         
@@ -59,38 +223,139 @@ def init_db():
             conn.execute("ALTER TABLE chats ADD COLUMN summary TEXT DEFAULT ''")
         except sqlite3.OperationalError:
             pass  # Column already exists
+
+        # Id of the newest message folded into the summary, so updates
+        # only feed genuinely new turns to the LLM
+        try:
+            conn.execute(
+                "ALTER TABLE chats ADD COLUMN summary_last_msg_id INTEGER DEFAULT 0"
+            )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
+        # Maintained message counter - avoids COUNT(*) scans on every
+        # summarization decision. Backfill once when the column is added.
+        try:
+            conn.execute(
+                "ALTER TABLE chats ADD COLUMN message_count INTEGER DEFAULT 0"
+            )
+            conn.execute("""
+                UPDATE chats SET message_count =
+                    (SELECT COUNT(*) FROM messages WHERE chat_id = chats.id)
+            """)
+        except sqlite3.OperationalError:
+            pass  # Column already exists
         
+        # INTEGER PRIMARY KEY aliases rowid: no 36-byte UUID keys in the
+        # B-tree, and the FTS triggers' NEW.rowid/OLD.rowid keep working
         conn.execute("""
             CREATE TABLE IF NOT EXISTS messages (
-                id TEXT PRIMARY KEY,
+                id INTEGER PRIMARY KEY,
                 chat_id TEXT NOT NULL,
                 role TEXT NOT NULL,
                 content TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                created_at INTEGER DEFAULT (CAST(strftime('%s','now') AS INTEGER)*1000),
                 FOREIGN KEY (chat_id) REFERENCES chats(id) ON DELETE CASCADE
             )
         """)
-        
-        # FTS5 for full-text search
+
+        # Migrate legacy ISO-TEXT timestamps to integer epoch milliseconds
+        # (integer compares beat lexicographic TEXT compares in ORDER BY)
         conn.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts 
-            USING fts5(content, chat_id UNINDEXED)
+            UPDATE chats SET
+                created_at = CAST(strftime('%s', created_at) AS INTEGER) * 1000,
+                updated_at = CAST(strftime('%s', updated_at) AS INTEGER) * 1000
+            WHERE typeof(created_at) = 'text'
         """)
+        conn.execute("""
+            UPDATE messages SET
+                created_at = CAST(strftime('%s', created_at) AS INTEGER) * 1000
+            WHERE typeof(created_at) = 'text'
+        """)
+
+        # Migrate legacy TEXT-uuid message ids to INTEGER (rowid) keys,
+        # preserving rowids so the FTS index stays aligned
+        id_type = next(
+            (
+                row["type"]
+                for row in conn.execute("PRAGMA table_info(messages)")
+                if row["name"] == "id"
+            ),
+            "",
+        )
+        if id_type.upper() == "TEXT":
+            conn.execute("""
+                CREATE TABLE messages_new (
+                    id INTEGER PRIMARY KEY,
+                    chat_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at INTEGER DEFAULT (CAST(strftime('%s','now') AS INTEGER)*1000),
+                    FOREIGN KEY (chat_id) REFERENCES chats(id) ON DELETE CASCADE
+                )
+            """)
+            conn.execute("""
+                INSERT INTO messages_new (id, chat_id, role, content, created_at)
+                SELECT rowid, chat_id, role, content, created_at FROM messages
+            """)
+            conn.execute("DROP TABLE messages")
+            conn.execute("ALTER TABLE messages_new RENAME TO messages")
         
-        # Triggers to sync FTS table
+        # FTS5 for full-text search - external-content mode indexes
+        # messages.content in place instead of storing a second copy,
+        # halving the bytes written per message insert
+        fts_row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'messages_fts'"
+        ).fetchone()
+        if fts_row is not None and "content='messages'" not in fts_row["sql"]:
+            # Migrate legacy contentful FTS table to external-content mode
+            conn.execute("DROP TABLE messages_fts")
+            fts_row = None
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+            USING fts5(content, content='messages', content_rowid='rowid')
+        """)
+        if fts_row is None:
+            # (Re)build the index from the content table
+            conn.execute(
+                "INSERT INTO messages_fts(messages_fts) VALUES('rebuild')"
+            )
+
+        # Triggers to sync FTS table and the chats.message_count counter
+        # (dropped and recreated so older trigger versions get upgraded)
+        conn.execute("DROP TRIGGER IF EXISTS messages_ai")
         conn.execute("""
-            CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
-                INSERT INTO messages_fts(rowid, content, chat_id) 
-                VALUES (NEW.rowid, NEW.content, NEW.chat_id);
+            CREATE TRIGGER messages_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, content)
+                VALUES (NEW.rowid, NEW.content);
+                UPDATE chats SET message_count = message_count + 1
+                WHERE id = NEW.chat_id;
             END
         """)
-        
+
+        conn.execute("DROP TRIGGER IF EXISTS messages_ad")
         conn.execute("""
-            CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
-                DELETE FROM messages_fts WHERE rowid = OLD.rowid;
+            CREATE TRIGGER messages_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content)
+                VALUES ('delete', OLD.rowid, OLD.content);
+                UPDATE chats SET message_count = message_count - 1
+                WHERE id = OLD.chat_id;
             END
         """)
-        
+
+        # Composite indexes so the per-turn queries are index range scans
+        # (ORDER BY satisfied by index order) instead of scan + filesort
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_messages_chat_created
+            ON messages(chat_id, created_at)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_chats_user_updated
+            ON chats(user_id, updated_at DESC)
+        """)
+        # Refresh planner statistics so the new indexes get picked
+        conn.execute("ANALYZE")
+
         env_badge = "PROD" if config.is_production else "DEV"
         print(f"✓ Database initialized [{env_badge}]: {get_db_path()}")
 
@@ -99,12 +364,12 @@ def init_db():
 
 def create_chat(user_id: str, title: Optional[str] = None) -> dict:
     """Create a new chat."""
-    chat_id = str(uuid.uuid4())
-    now = datetime.utcnow().isoformat()
+    chat_id = uuid.uuid4().hex  # 32 chars, no dashes - smaller B-tree keys
+    now = _now_ms()
     
     with get_connection() as conn:
         conn.execute(
-            "INSERT INTO chats (id, user_id, title, summary, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            _SQL_INSERT_CHAT,
             (chat_id, user_id, title or "New Chat", "", now, now)
         )
     
@@ -112,12 +377,9 @@ def create_chat(user_id: str, title: Optional[str] = None) -> dict:
 
 
 def get_chats(user_id: str) -> list[dict]:
-    """Get all chats for a user, ordered by most recent."""
+    """Get all chats for a user, ordered by most recent (slim rows)."""
     with get_connection() as conn:
-        rows = conn.execute(
-            "SELECT * FROM chats WHERE user_id = ? ORDER BY updated_at DESC",
-            (user_id,)
-        ).fetchall()
+        rows = conn.execute(_SQL_GET_CHATS, (user_id,)).fetchall()
     
     return [dict(row) for row in rows]
 
@@ -125,25 +387,23 @@ def get_chats(user_id: str) -> list[dict]:
 def get_chat(chat_id: str) -> Optional[dict]:
     """Get a single chat by ID."""
     with get_connection() as conn:
-        row = conn.execute("SELECT * FROM chats WHERE id = ?", (chat_id,)).fetchone()
+        row = conn.execute(_SQL_GET_CHAT, (chat_id,)).fetchone()
     
     return dict(row) if row else None
 
 
 def update_chat_title(chat_id: str, title: str):
     """Update a chat's title."""
-    now = datetime.utcnow().isoformat()
+    now = _now_ms()
     with get_connection() as conn:
-        conn.execute(
-            "UPDATE chats SET title = ?, updated_at = ? WHERE id = ?",
-            (title, now, chat_id)
-        )
+        conn.execute(_SQL_UPDATE_CHAT_TITLE, (title, now, chat_id))
 
 
 def delete_chat(chat_id: str):
     """Delete a chat and all its messages (cascading)."""
     with get_connection() as conn:
-        conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+        conn.execute(_SQL_DELETE_CHAT, (chat_id,))
+    context_cache.invalidate(chat_id)
 
 
 # ========== Phase 3: Summary Functions ==========
@@ -151,89 +411,127 @@ def delete_chat(chat_id: str):
 def get_summary(chat_id: str) -> str:
     """Get the rolling summary for a chat (Tier 3)."""
     with get_connection() as conn:
-        row = conn.execute(
-            "SELECT summary FROM chats WHERE id = ?", 
-            (chat_id,)
-        ).fetchone()
+        row = conn.execute(_SQL_GET_SUMMARY, (chat_id,)).fetchone()
     
     return row["summary"] if row and row["summary"] else ""
 
 
-def update_summary(chat_id: str, summary: str):
-    """Update the rolling summary for a chat."""
-    now = datetime.utcnow().isoformat()
+def update_summary(chat_id: str, summary: str, last_message_id: Optional[int] = None):
+    """Update the rolling summary for a chat. When last_message_id is
+    given, also records the summarization high-water mark."""
+    now = _now_ms()
     with get_connection() as conn:
-        conn.execute(
-            "UPDATE chats SET summary = ?, updated_at = ? WHERE id = ?",
-            (summary, now, chat_id)
-        )
+        if last_message_id is None:
+            conn.execute(_SQL_UPDATE_SUMMARY, (summary, now, chat_id))
+        else:
+            conn.execute(
+                _SQL_UPDATE_SUMMARY_STATE, (summary, last_message_id, now, chat_id)
+            )
+    context_cache.invalidate(chat_id)
 
 
-def get_message_count(chat_id: str) -> int:
-    """Get the count of messages in a chat."""
+def get_summary_state(chat_id: str) -> tuple[str, int]:
+    """Get the rolling summary and the id of the last message it covers."""
+    with get_connection() as conn:
+        row = conn.execute(_SQL_GET_SUMMARY_STATE, (chat_id,)).fetchone()
+
+    if not row:
+        return "", 0
+    return row["summary"] or "", row["summary_last_msg_id"] or 0
+
+
+def get_new_messages_text(chat_id: str, after_id: int, limit: int = 40) -> tuple[str, int]:
+    """Messages newer than after_id as formatted text (same shape as
+    get_recent_messages_text) plus the highest id included, capped at
+    the newest `limit` messages. Returns ("", 0) when nothing is new."""
     with get_connection() as conn:
         row = conn.execute(
-            "SELECT COUNT(*) as count FROM messages WHERE chat_id = ?",
-            (chat_id,)
+            _SQL_GET_NEW_MESSAGES_TEXT, (chat_id, after_id, limit)
         ).fetchone()
-    
-    return row["count"] if row else 0
+
+    if not row or not row["text"]:
+        return "", 0
+    return row["text"], row["last_id"] or 0
+
+
+def get_message_count(chat_id: str) -> int:
+    """Get the count of messages in a chat (O(1) counter read)."""
+    with get_connection() as conn:
+        row = conn.execute(_SQL_GET_MESSAGE_COUNT, (chat_id,)).fetchone()
+
+    return row["message_count"] if row else 0
 
 
 def get_recent_messages_text(chat_id: str, limit: int = 15) -> str:
-    """Get recent messages as formatted text for summarization (Tier 1)."""
+    """Get recent messages as formatted text for summarization (Tier 1).
+
+    Formatting (ROLE: content, newest-limit window, chronological order)
+    happens inside SQLite via group_concat, so a single string crosses the
+    boundary instead of N rows."""
     with get_connection() as conn:
-        rows = conn.execute(
-            """SELECT role, content FROM messages 
-               WHERE chat_id = ? 
-               ORDER BY created_at DESC 
-               LIMIT ?""",
-            (chat_id, limit)
-        ).fetchall()
-    
-    # Reverse to get chronological order
-    messages = list(reversed(rows))
-    return "\n".join([f"{m['role'].upper()}: {m['content']}" for m in messages])
+        row = conn.execute(
+            _SQL_GET_RECENT_MESSAGES_TEXT, (chat_id, limit)
+        ).fetchone()
+
+    return row["text"] or "" if row else ""
 
 
 # ========== Message CRUD ==========
 
 def add_message(chat_id: str, role: str, content: str) -> dict:
     """Add a message to a chat."""
-    msg_id = str(uuid.uuid4())
-    now = datetime.utcnow().isoformat()
-    
+    now = _now_ms()
+
     with get_connection() as conn:
-        conn.execute(
-            "INSERT INTO messages (id, chat_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
-            (msg_id, chat_id, role, content, now)
-        )
+        # BEGIN IMMEDIATE takes the write lock up front so the INSERT and
+        # the chats touch commit as one transaction with a single WAL sync
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(_SQL_INSERT_MESSAGE, (chat_id, role, content, now))
+        msg_id = cur.lastrowid
         # Update chat's updated_at
-        conn.execute(
-            "UPDATE chats SET updated_at = ? WHERE id = ?",
-            (now, chat_id)
-        )
-    
+        conn.execute(_SQL_TOUCH_CHAT, (now, chat_id))
+
+    # New message changes the recent-history tier
+    context_cache.invalidate(chat_id)
+
     return {"id": msg_id, "chat_id": chat_id, "role": role, "content": content, "created_at": now}
 
 
+def bulk_add_messages(chat_id: str, messages: list[tuple[str, str]]) -> int:
+    """
+    Insert many (role, content) pairs in one transaction.
+    executemany under a single BEGIN IMMEDIATE means one WAL commit for the
+    whole batch - the fast path for imports/restores.
+
+    Returns:
+        Number of messages inserted
+    """
+    if not messages:
+        return 0
+
+    now = _now_ms()
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            _SQL_INSERT_MESSAGE,
+            [(chat_id, role, content, now) for role, content in messages],
+        )
+        conn.execute(_SQL_TOUCH_CHAT, (now, chat_id))
+
+    context_cache.invalidate(chat_id)
+    return len(messages)
+
+
 def get_messages(chat_id: str, limit: Optional[int] = None) -> list[dict]:
     """Get messages for a chat, ordered chronologically. Optional limit for recent messages."""
     with get_connection() as conn:
         if limit:
             # Get last N messages
-            rows = conn.execute(
-                """SELECT * FROM messages WHERE chat_id = ? 
-                   ORDER BY created_at DESC LIMIT ?""",
-                (chat_id, limit)
-            ).fetchall()
+            rows = conn.execute(_SQL_GET_MESSAGES_DESC, (chat_id, limit)).fetchall()
             # Reverse to get chronological order
             rows = list(reversed(rows))
         else:
-            rows = conn.execute(
-                "SELECT * FROM messages WHERE chat_id = ? ORDER BY created_at ASC",
-                (chat_id,)
-            ).fetchall()
+            rows = conn.execute(_SQL_GET_MESSAGES_ASC, (chat_id,)).fetchall()
     
     return [dict(row) for row in rows]
 
@@ -242,41 +540,106 @@ def get_messages(chat_id: str, limit: Optional[int] = None) -> list[dict]:
 
 def search_chats(user_id: str, query: str) -> list[dict]:
     """Full-text search across messages, returns matching chats."""
+    # Quote the query as a single phrase (doubling embedded quotes) and
+    # append * so FTS5 treats it as a prefix match. Raw user input is
+    # otherwise parsed as FTS5 syntax: '(' or an unbalanced quote raises
+    # OperationalError, and 'hello-world' is read as a column filter -
+    # exactly what search-as-you-type keystrokes produce.
+    term = '"' + query.replace('"', '""') + '"*'
+    # EXISTS semi-join instead of JOIN + DISTINCT: a chat with many hits
+    # stops at the first matching message rather than producing one row
+    # per hit for the dedup pass to throw away. MATCH against the indexed
+    # column and join through messages.rowid so the FTS5 planner drives
+    # the probe from its inverted index.
     with get_connection() as conn:
         rows = conn.execute("""
-            SELECT DISTINCT c.* FROM chats c
-            JOIN messages_fts fts ON c.id = fts.chat_id
-            WHERE c.user_id = ? AND messages_fts MATCH ?
+            SELECT c.id, c.user_id, c.title, c.created_at,
+                   c.updated_at, c.message_count
+            FROM chats c
+            WHERE c.user_id = ?
+              AND EXISTS (
+                  SELECT 1 FROM messages m
+                  JOIN messages_fts fts ON fts.rowid = m.rowid
+                  WHERE m.chat_id = c.id AND fts.content MATCH ?
+              )
             ORDER BY c.updated_at DESC
-        """, (user_id, query)).fetchall()
-    
+        """, (user_id, term)).fetchall()
+
     return [dict(row) for row in rows]
 
 
 # ========== Adaptive Context (Query-Aware Tier Selection) ==========
 
 
-def classify_query_intent(user_query: str) -> dict:
+# Keyword fast paths for the obvious intent buckets - resolves most turns
+# without the classifier LLM round trip
+_FAST_INTENT_PATTERNS: tuple[tuple[re.Pattern, str, bool], ...] = (
+    (
+        re.compile(
+            r"^(and|so|then|what about|how about|continue|go on|more details?"
+            r"|tell me more|keep going)\b",
+            re.IGNORECASE,
+        ),
+        "followup",
+        True,
+    ),
+    (
+        re.compile(
+            r"\b(catch me up|what have we (discussed|talked about)"
+            r"|remind me what|recap|summar(y|ize))\b",
+            re.IGNORECASE,
+        ),
+        "overview",
+        True,
+    ),
+    (
+        re.compile(
+            r"\b(what'?s my|where (am i|are we)|who am i|do you remember"
+            r"|my favou?rite|about me)\b",
+            re.IGNORECASE,
+        ),
+        "factual",
+        True,
+    ),
+    (
+        re.compile(
+            r"\b(news|weather|price|prices|stock|headlines?)\b", re.IGNORECASE
+        ),
+        "new_topic",
+        False,
+    ),
+)
+
+
+def fast_intent(user_query: str) -> Optional[dict]:
+    """Resolve obvious intents with keyword heuristics - no LLM call."""
+    query = user_query.strip()
+    for pattern, intent, needs_history in _FAST_INTENT_PATTERNS:
+        if pattern.search(query):
+            return {"intent": intent, "needs_history": needs_history}
+    return None
+
+
+# Strips markdown code fences (``` / ```json) in one pass
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+@lru_cache(maxsize=2048)
+def _classify_intent_llm(normalized_query: str) -> tuple[str, bool]:
     """
-    Use LLM to classify query intent for adaptive context selection.
-
-    Returns:
-        {
-            "intent": str,  # "followup" | "factual" | "overview" | "new_topic"
-            "needs_history": bool  # Whether to include recent messages
-        }
+    LLM classification, memoized on the normalized query.
+    Raises on failure so errors are never cached.
     """
-    try:
-        response = httpx.post(
-            f"{config.llm_base_url}/chat/completions",
-            json={
-                "model": config.llm_model_name,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"""Classify this query's intent. Reply with ONLY a JSON object.
+    response = httpx.post(
+        f"{config.llm_base_url}/chat/completions",
+        json={
+            "model": config.llm_model_name,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"""Classify this query's intent. Reply with ONLY a JSON object.
 
-Query: "{user_query}"
+Query: "{normalized_query}"
 
 Categories:
 - "followup": References previous context ("what about X?", "and then?", "continue", "more details")
@@ -285,27 +648,70 @@ Categories:
 - "new_topic": Starts a fresh topic unrelated to prior context
 
 Reply format: {{"intent": "<category>", "needs_history": true/false}}""",
-                    }
-                ],
-                "max_tokens": 50,
-                "temperature": 0,
-            },
-            headers={"Authorization": f"Bearer {config.llm_api_key}"},
-            timeout=5.0,
+                }
+            ],
+            "max_tokens": 50,
+            "temperature": 0,
+        },
+        headers={"Authorization": f"Bearer {config.llm_api_key}"},
+        timeout=5.0,
+    )
+    response.raise_for_status()
+    content = orjson.loads(response.content)["choices"][0]["message"]["content"]
+    # Parse JSON from response (handle markdown code blocks)
+    if "```" in content:
+        content = _FENCE_RE.sub("", content).strip()
+    result = orjson.loads(content)
+    return result.get("intent", "general"), bool(result.get("needs_history", True))
+
+
+def classify_query_intent(user_query: str) -> dict:
+    """
+    Classify query intent for adaptive context selection.
+    Obvious cases resolve via keyword heuristics; the rest go through the
+    LLM classifier, memoized on the normalized query.
+
+    Returns:
+        {
+            "intent": str,  # "followup" | "factual" | "overview" | "new_topic"
+            "needs_history": bool  # Whether to include recent messages
+        }
+    """
+    fast = fast_intent(user_query)
+    if fast is not None:
+        return fast
+
+    try:
+        intent, needs_history = _classify_intent_llm(
+            " ".join(user_query.lower().split())
         )
-        response.raise_for_status()
-        content = response.json()["choices"][0]["message"]["content"]
-        # Parse JSON from response (handle markdown code blocks)
-        if "```" in content:
-            content = content.split("```")[1].strip()
-            if content.startswith("json"):
-                content = content[4:].strip()
-        return json.loads(content)
+        return {"intent": intent, "needs_history": needs_history}
     except Exception as e:
         print(f"⚠ Intent classification failed: {e}")
         return {"intent": "general", "needs_history": True}
 
 
+def _get_summary_and_recent(chat_id: str, limit: int) -> tuple[str, str]:
+    """Fetch the summary and formatted recent messages in one statement."""
+    with get_connection() as conn:
+        row = conn.execute(
+            """SELECT c.summary AS summary,
+                      (SELECT group_concat(line, char(10)) FROM (
+                           SELECT upper(role) || ': ' || content AS line
+                           FROM (SELECT id, role, content FROM messages
+                                 WHERE chat_id = c.id
+                                 ORDER BY created_at DESC, id DESC LIMIT ?)
+                           ORDER BY id ASC LIMIT -1
+                       )) AS recent
+               FROM chats c WHERE c.id = ?""",
+            (limit, chat_id),
+        ).fetchone()
+
+    if row is None:
+        return "", ""
+    return row["summary"] or "", row["recent"] or ""
+
+
 def get_adaptive_context(user_query: str, chat_id: str, user_id: str) -> dict:
     """
     Returns context components based on query intent.
@@ -319,43 +725,44 @@ def get_adaptive_context(user_query: str, chat_id: str, user_id: str) -> dict:
     # Import here to avoid circular imports
     from tools.memory_tool import retrieve_context
 
-    # 1. Classify intent (cheap LLM call, ~50 tokens)
-    intent_result = classify_query_intent(user_query)
+    # 1+2. Intent classification and vector retrieval are independent
+    # network calls (LLM vs embedder+Qdrant), so overlap them instead of
+    # paying their latencies back to back
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        intent_future = pool.submit(classify_query_intent, user_query)
+        facts_future = pool.submit(retrieve_context, user_query, user_id)
+        intent_result = intent_future.result()
+        facts = facts_future.result()
+
     intent = intent_result.get("intent", "general")
     needs_history = intent_result.get("needs_history", True)
 
     print(f"📊 Query intent: {intent} (needs_history: {needs_history})")
 
-    # 2. Always get vector facts (they're query-relevant by definition)
-    facts = retrieve_context(user_query, user_id)
-
-    # 3. Adaptive tier selection based on intent
-    summary = ""
-    recent = ""
-
+    # 3. Adaptive tier selection based on intent - resolve which tiers are
+    # wanted first, then fetch both in one statement on one connection
     if intent == "overview":
         # Overview query → prioritize summary, minimal recent
-        summary = get_summary(chat_id) if chat_id else ""
-        recent = get_recent_messages_text(chat_id, limit=2) if chat_id else ""
-
+        want_summary, recent_limit = True, 2
     elif intent == "followup":
         # Follow-up → prioritize recent context, skip summary
-        recent = get_recent_messages_text(chat_id, limit=5) if chat_id else ""
-
+        want_summary, recent_limit = False, 5
     elif intent == "factual":
         # Factual → vector facts are primary, summary if needed
-        summary = get_summary(chat_id) if (needs_history and chat_id) else ""
-        recent = ""
-
+        want_summary, recent_limit = needs_history, 0
     elif intent == "new_topic":
         # New topic → just vector facts, no old context pollution
-        summary = ""
-        recent = ""
-
+        want_summary, recent_limit = False, 0
     else:
         # Default (general): include balanced context
-        summary = get_summary(chat_id) if chat_id else ""
-        recent = get_recent_messages_text(chat_id, limit=3) if chat_id else ""
+        want_summary, recent_limit = True, 3
+
+    summary = ""
+    recent = ""
+    if chat_id and (want_summary or recent_limit):
+        summary, recent = _get_summary_and_recent(chat_id, recent_limit)
+        if not want_summary:
+            summary = ""
 
     return {
         "facts": facts,
@@ -365,6 +772,3 @@ def get_adaptive_context(user_query: str, chat_id: str, user_id: str) -> dict:
         "needs_history": needs_history,
     }
 
-
-# Initialize on import
-init_db()
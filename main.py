@@ -2,6 +2,8 @@
 Main CLI Entry Point - Interactive REPL for the Local Memory Agent.
 """
 import sys
+import threading
+from collections import deque
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
@@ -10,9 +12,20 @@ from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 
 from config import config
 from agent_graph import run_agent
+from database import run_maintenance
 
 console = Console()
 
+# Checkpoint the WAL / refresh stats every 15 minutes so long REPL
+# sessions never hit a stalled auto-checkpoint mid-commit
+MAINTENANCE_INTERVAL_SECONDS = 900
+
+
+def _maintenance_loop(stop_event: threading.Event) -> None:
+    """Background DB maintenance for long-running sessions."""
+    while not stop_event.wait(MAINTENANCE_INTERVAL_SECONDS):
+        run_maintenance()
+
 
 def print_welcome():
     """Print welcome banner."""
@@ -29,41 +42,65 @@ def main():
     """Main CLI loop."""
     config.validate()
     print_welcome()
-    
-    history: list[BaseMessage] = []
-    
+
+    stop_maintenance = threading.Event()
+    threading.Thread(
+        target=_maintenance_loop,
+        args=(stop_maintenance,),
+        daemon=True,
+        name="db-maintenance",
+    ).start()
+
+    # Bounded history: old turns fall off automatically instead of the
+    # list (and every downstream prompt build) growing without limit
+    history: deque[BaseMessage] = deque(maxlen=40)
+
+    def cmd_quit() -> str:
+        stop_maintenance.set()
+        run_maintenance()
+        console.print("[dim]Goodbye! 👋[/dim]")
+        return "quit"
+
+    def cmd_clear() -> None:
+        history.clear()
+        console.print("[dim]Conversation cleared.[/dim]")
+
+    def cmd_history() -> None:
+        if not history:
+            console.print("[dim]No conversation history.[/dim]")
+        else:
+            for msg in history:
+                role = "You" if isinstance(msg, HumanMessage) else "AI"
+                console.print(f"[dim]{role}: {msg.content[:100]}...[/dim]")
+
+    commands = {
+        "/quit": cmd_quit,
+        "/clear": cmd_clear,
+        "/history": cmd_history,
+    }
+
     while True:
         try:
             # Get user input
             user_input = Prompt.ask("\n[bold green]You[/bold green]")
             
-            if not user_input.strip():
-                continue
-            
-            # Handle commands
-            if user_input.strip().lower() == "/quit":
-                console.print("[dim]Goodbye! 👋[/dim]")
-                break
-            
-            if user_input.strip().lower() == "/clear":
-                history = []
-                console.print("[dim]Conversation cleared.[/dim]")
+            normalized = user_input.strip().lower()
+
+            if not normalized:
                 continue
-            
-            if user_input.strip().lower() == "/history":
-                if not history:
-                    console.print("[dim]No conversation history.[/dim]")
-                else:
-                    for msg in history:
-                        role = "You" if isinstance(msg, HumanMessage) else "AI"
-                        console.print(f"[dim]{role}: {msg.content[:100]}...[/dim]")
+
+            # Handle commands via single dict lookup (input normalized once)
+            handler = commands.get(normalized)
+            if handler is not None:
+                if handler() == "quit":
+                    break
                 continue
-            
+
             # Run the agent
             console.print("\n[bold blue]Assistant[/bold blue]", end=" ")
             
             with console.status("[dim]Thinking...[/dim]", spinner="dots"):
-                response = run_agent(user_input, history.copy())
+                response = run_agent(user_input, list(history))
             
             # Display response as markdown
             console.print()
@@ -0,0 +1,167 @@
+"""
+Semantic Cache - Final-response cache keyed by query embedding.
+Near-duplicate queries skip the agent graph entirely and return a cached
+response in embedding-lookup time instead of full agent latency.
+"""
+
+import re
+import time
+import uuid
+from typing import Optional
+
+from qdrant_client.http.models import (
+    VectorParams,
+    Distance,
+    PointStruct,
+    Filter,
+    FieldCondition,
+    MatchValue,
+    Range,
+)
+
+from config import config
+from tools.memory_tool import get_qdrant_client, embed_query, _get_embedding_dim
+
+# Cache tuning
+SIMILARITY_THRESHOLD = 0.95  # Cosine similarity for a cache hit
+CACHE_TTL_SECONDS = 3600  # Entries older than this are ignored
+
+# Time-sensitive queries (news, prices, weather...) must never be served
+# from cache - the answer changes between asks
+_TIME_SENSITIVE_PATTERN = re.compile(
+    r"\b(news|price|prices|stock|weather|today|tonight|now|latest|current|currently)\b",
+    re.IGNORECASE,
+)
+
+_collection_ready = False
+
+
+def _cache_collection() -> str:
+    """Cache collection name, environment-aware like the memory collection."""
+    return f"megpt_semcache_{config.env_mode}"
+
+
+def _ensure_cache_collection() -> bool:
+    """Create the cache collection on first use."""
+    global _collection_ready
+    if _collection_ready:
+        return True
+
+    client = get_qdrant_client()
+    if client is None:
+        return False
+
+    try:
+        # Targeted existence check instead of listing every collection
+        if not client.collection_exists(_cache_collection()):
+            client.create_collection(
+                collection_name=_cache_collection(),
+                vectors_config=VectorParams(
+                    size=_get_embedding_dim(),
+                    distance=Distance.COSINE,
+                ),
+            )
+            print(f"✓ Created semantic cache collection: {_cache_collection()}")
+
+        _collection_ready = True
+        return True
+    except Exception as e:
+        print(f"⚠ Semantic cache collection check failed: {e}")
+        return False
+
+
+def is_cacheable(user_input: str) -> bool:
+    """Check whether a query is safe to serve/store from cache."""
+    return not _TIME_SENSITIVE_PATTERN.search(user_input)
+
+
+def lookup(user_input: str, user_id: str | None = None) -> Optional[str]:
+    """
+    Look up a cached response for a near-duplicate query.
+
+    Args:
+        user_input: The user's current message
+        user_id: Optional user identifier
+
+    Returns:
+        The cached response on a hit, None on a miss
+    """
+    if not user_input or not is_cacheable(user_input):
+        return None
+
+    user_id = user_id or config.user_id
+    client = get_qdrant_client()
+
+    if client is None or not _ensure_cache_collection():
+        return None
+
+    try:
+        query_embedding = embed_query(user_input)
+        if query_embedding is None:
+            return None
+
+        min_ts = time.time() - CACHE_TTL_SECONDS
+        results = client.query_points(
+            collection_name=_cache_collection(),
+            query=query_embedding,
+            query_filter=Filter(
+                must=[
+                    FieldCondition(key="user_id", match=MatchValue(value=user_id)),
+                    FieldCondition(key="ts", range=Range(gte=min_ts)),
+                ]
+            ),
+            limit=1,
+            with_payload=True,
+        )
+
+        if not results or not results.points:
+            return None
+
+        hit = results.points[0]
+        if hit.score and hit.score >= SIMILARITY_THRESHOLD:
+            print(f"⚡ Semantic cache hit (score: {hit.score:.3f})")
+            return hit.payload.get("response")
+
+        return None
+    except Exception as e:
+        print(f"⚠ Semantic cache lookup failed: {e}")
+        return None
+
+
+def store(user_input: str, response: str, user_id: str | None = None) -> None:
+    """
+    Store a (query, response) pair for future cache hits.
+
+    Args:
+        user_input: The user's message
+        response: The final agent response
+        user_id: Optional user identifier
+    """
+    if not user_input or not response or not is_cacheable(user_input):
+        return
+
+    user_id = user_id or config.user_id
+    client = get_qdrant_client()
+
+    if client is None or not _ensure_cache_collection():
+        return
+
+    try:
+        embedding = embed_query(user_input)
+        if embedding is None:
+            return
+
+        point = PointStruct(
+            id=str(uuid.uuid4()),
+            vector=embedding,
+            payload={
+                "user_id": user_id,
+                "query": user_input,
+                "response": response,
+                "ts": time.time(),
+            },
+        )
+
+        client.upsert(collection_name=_cache_collection(), points=[point])
+    except Exception as e:
+        print(f"⚠ Semantic cache store failed: {e}")
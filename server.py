@@ -3,11 +3,17 @@ FastAPI Backend Server - SSE streaming with Vercel AI Data Stream Protocol.
 Brain Transplant: Routes through agent_graph.py for proper tool execution.
 """
 
-import json
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header
+
+import orjson
+import msgspec
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, field_validator
 
 from config import config
@@ -17,12 +23,18 @@ from database import (
     get_chat,
     update_chat_title,
     delete_chat,
-    add_message,
+    bulk_add_messages,
     get_messages,
     search_chats,
     get_message_count,
 )
-from tools.memory_tool import get_all_memories, delete_memory, delete_memories_for_chat
+from tools.memory_tool import (
+    get_all_memories,
+    delete_memory,
+    delete_memories_for_chat,
+    retrieve_context,
+)
+from utils.llm_factory import get_llm
 from tools.summary_tool import summarize_chat_background
 from tools.backup_tool import (
     create_backup,
@@ -32,6 +44,7 @@ from tools.backup_tool import (
     get_backup_info,
 )
 from utils.model_loader import ensure_models_loaded
+from agent_graph import get_agent
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
 
 app = FastAPI(
@@ -43,7 +56,13 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event():
-    """Load models on server startup."""
+    """Load models and start the write-behind message writer."""
+    global _msg_writer_task
+    _msg_writer_task = asyncio.create_task(_message_writer_loop())
+
+    # Compile the graph now so the first request doesn't pay for it
+    get_agent()
+
     print("🔄 Loading models in LM Studio...")
     success = await ensure_models_loaded()
     if success:
@@ -51,6 +70,49 @@ async def startup_event():
     else:
         print("⚠ Models may not be loaded - check LM Studio")
 
+    async def _warmup():
+        """One tiny call per model so the first real request hits warm
+        tokenizers, connection pools, and server-side caches."""
+        try:
+            await get_llm(streaming=True).bind(max_tokens=1).ainvoke("ping")
+        except Exception:
+            pass
+        try:
+            await asyncio.to_thread(retrieve_context, "warmup", "__warmup__")
+        except Exception:
+            pass
+        print("✓ Warmup complete")
+
+    # Runs in the background; startup (and the first request) need not wait
+    asyncio.create_task(_warmup())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the message writer and flush anything still queued."""
+    if _msg_writer_task is not None:
+        _msg_writer_task.cancel()
+    remaining = []
+    while not _msg_queue.empty():
+        remaining.append(_msg_queue.get_nowait())
+    if remaining:
+        await asyncio.to_thread(_flush_message_batch, remaining)
+    _SUMMARY_EXECUTOR.shutdown(wait=False)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip for bulky JSON endpoints; the SSE stream passes through
+    untouched so gzip buffering can't delay time-to-first-token."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/api/chat":
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress large message/memory/search payloads (3-6x smaller on JSON)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
 
 # Enable CORS for Next.js frontend
 app.add_middleware(
@@ -90,12 +152,25 @@ class Message(BaseModel):
         return v
 
 
-class ChatRequest(BaseModel):
-    messages: list[Message]
+# The streaming route parses its body with msgspec instead of Pydantic
+# dependency injection: same shape and constraints, roughly an order of
+# magnitude less parse time before the first status event goes out
+class ChatMessage(msgspec.Struct, frozen=True):
+    role: str
+    content: str
+
+
+class ChatPayload(msgspec.Struct, frozen=True):
+    messages: list[ChatMessage]
     user_id: Optional[str] = None
     chat_id: Optional[str] = None
 
 
+_chat_decoder = msgspec.json.Decoder(ChatPayload)
+
+_MAX_MESSAGE_LENGTH = 50000  # mirrors Message.validate_content_length
+
+
 class ChatCreate(BaseModel):
     title: Optional[str] = None
 
@@ -136,56 +211,118 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None)) -> None:
 # ========== Helpers ==========
 
 
+# Role → message constructor; unknown roles are dropped, as before
+_MESSAGE_CTOR = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+    "system": SystemMessage,
+}
+
+
 def convert_messages(messages: list[Message]) -> list[BaseMessage]:
     """Convert API messages to LangChain message format."""
-    result = []
-    for msg in messages:
-        if msg.role == "user":
-            result.append(HumanMessage(content=msg.content))
-        elif msg.role == "assistant":
-            result.append(AIMessage(content=msg.content))
-        elif msg.role == "system":
-            result.append(SystemMessage(content=msg.content))
-    return result
+    return [
+        _MESSAGE_CTOR[m.role](content=m.content)
+        for m in messages
+        if m.role in _MESSAGE_CTOR
+    ]
 
 
-def format_event(event_type: str, content: str) -> str:
-    """Format event for Vercel AI Data Stream Protocol."""
-    return f"0:{json.dumps({'type': event_type, 'content': content})}\n"
+# Envelope prefix per event type, built once; only the content varies
+# per call, and orjson handles its escaping
+_EVENT_PREFIX = {
+    t: b'0:{"type":"' + t.encode() + b'","content":'
+    for t in ("status", "text", "error")
+}
+
+
+def format_event(event_type: str, content: str) -> bytes:
+    """Format event for Vercel AI Data Stream Protocol (wire-ready bytes)."""
+    return _EVENT_PREFIX[event_type] + orjson.dumps(content) + b"}\n"
+
+
+# Status lines keyed by graph node, emitted when the node starts
+_NODE_STATUS = {
+    "assemble_context": "🧠 Context loaded...",
+    "reason": "💭 Thinking...",
+    "tools": "🔎 Using web_search...",
+    "memorize": "💾 Saved to memory",
+}
+
+# Growth-factor chunk batching: the first flush happens after a single
+# token (TTFT preserved), then batches grow 1 → 3 → 9 → 27 → 32 so a long
+# response costs a handful of ASGI sends instead of one per token
+_MAX_BATCH = 32
+_BATCH_GROWTH = 3
+_FLUSH_INTERVAL = 0.02  # seconds; bounds worst-case token staleness
+
+# Message counts for the summary trigger, tracked in-process: one DB
+# read seeds a chat's counter, each finished turn adds its two messages
+# locally, and a periodic resync corrects drift from direct /messages
+# posts. Worst case for being off is one early or skipped summary.
+_chat_msg_counter: dict[str, int] = {}
+_chat_turns_since_sync: dict[str, int] = {}
+_COUNTER_RESYNC_TURNS = 50
+
+# Summaries run on their own small pool: BackgroundTasks executes sync
+# callables after the response, which held the worker (and the SSE
+# close) hostage to a multi-second LLM call
+_SUMMARY_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+
+def _estimated_message_count(chat_id: str) -> int:
+    """Message count for a chat without a per-turn SQL round-trip."""
+    turns = _chat_turns_since_sync.get(chat_id, 0)
+    if chat_id not in _chat_msg_counter or turns >= _COUNTER_RESYNC_TURNS:
+        _chat_msg_counter[chat_id] = get_message_count(chat_id)
+        _chat_turns_since_sync[chat_id] = 0
+    else:
+        _chat_msg_counter[chat_id] += 2  # user turn + assistant reply
+        _chat_turns_since_sync[chat_id] = turns + 1
+    return _chat_msg_counter[chat_id]
 
 
 async def stream_response(
-    messages: list[Message],
+    messages: list[ChatMessage],
     user_id: str,
     chat_id: Optional[str] = None,
-    background_tasks: Optional[BackgroundTasks] = None,
 ):
     """
     Stream the LLM response through the Agent Graph.
     Brain Transplant: Routes through agent_graph.py for proper tool execution.
     """
-    from agent_graph import agent
-    from langchain_core.messages import HumanMessage
+    agent = get_agent()
 
-    # Get the last user message
-    user_messages = [m for m in messages if m.role == "user"]
-    last_user_input = user_messages[-1].content if user_messages else ""
+    # Last user message via reverse scan: stops at the first hit instead
+    # of materializing a filtered copy of the whole history
+    last_user_input = next(
+        (m.content for m in reversed(messages) if m.role == "user"), ""
+    )
 
     # Status: Starting
     yield format_event("status", "🧠 Recalling memories...")
 
-    # Agent graph now handles adaptive context management
-    # Just send current input - let agent_graph fetch DB history smartly
-    history = [HumanMessage(content=last_user_input)]
+    # Agent graph handles adaptive context itself: only the current input
+    # goes in; DB history is fetched inside the recall nodes. Seed it as
+    # a message too (like run_agent_async does): the write-behind queue
+    # means the user turn may not be in SQLite yet when recall runs, and
+    # intent-based context trimming can drop recent history outright -
+    # either way the question must reach the model independently.
+
+    final_response = ""
+    streamed_any = False
 
-    full_response = ""
-    last_node = ""
+    # Token batching state (see _MAX_BATCH / _BATCH_GROWTH above)
+    buf: list[str] = []
+    batch_size = 1
+    last_flush = time.monotonic()
 
     try:
-        # Stream from LangGraph using astream (yields state updates per node)
-        async for state_update in agent.astream(
-            input={
-                "messages": [],
+        # Stream token events from LangGraph so the client sees text as
+        # the LLM generates it instead of one blob after the respond node
+        async for event in agent.astream_events(
+            {
+                "messages": [HumanMessage(content=last_user_input)],
                 "user_input": last_user_input,
                 "chat_id": chat_id,
                 "user_id": user_id,
@@ -193,37 +330,54 @@ async def stream_response(
                 "final_response": "",
                 "tool_call_count": 0,
             },
-            stream_mode="updates",  # Get updates per node
+            version="v2",
         ):
-            # state_update is a dict with node name as key
-            for node_name, node_output in state_update.items():
-                print(f"🔄 Node '{node_name}' completed")
-
-                # Track status based on node
-                if node_name == "recall":
-                    yield format_event("status", "🧠 Context loaded...")
-                elif node_name == "reason":
-                    yield format_event("status", "💭 Thinking...")
-                elif node_name == "tools":
-                    yield format_event("status", "🔎 Using web_search...")
-                elif node_name == "respond":
-                    # Get the final response from state
-                    final = node_output.get("final_response", "")
-                    if final:
-                        full_response = final
-                        yield format_event("text", final)
-                elif node_name == "memorize":
-                    yield format_event("status", "💾 Saved to memory")
+            kind = event.get("event")
+
+            if kind == "on_chain_start":
+                status = _NODE_STATUS.get(event.get("name", ""))
+                if status:
+                    yield format_event("status", status)
+
+            elif kind == "on_chat_model_stream":
+                chunk = event.get("data", {}).get("chunk")
+                content = getattr(chunk, "content", "")
+                # Tool-call deltas carry no text content and are skipped
+                if not content:
+                    continue
+                streamed_any = True
+                buf.append(content)
+                now = time.monotonic()
+                if len(buf) >= batch_size or now - last_flush > _FLUSH_INTERVAL:
+                    yield format_event("text", "".join(buf))
+                    buf.clear()
+                    batch_size = min(_MAX_BATCH, batch_size * _BATCH_GROWTH)
+                    last_flush = now
+
+            elif kind == "on_chain_end" and event.get("name") == "LangGraph":
+                output = event.get("data", {}).get("output") or {}
+                if isinstance(output, dict):
+                    final_response = output.get("final_response", "")
+
+        if buf:
+            yield format_event("text", "".join(buf))
+
+        # Cache hits (and models that don't emit token chunks) resolve
+        # inside the graph without streaming; send the response whole
+        if not streamed_any and final_response:
+            yield format_event("text", final_response)
 
         # ========== Background Summary ==========
-        if chat_id and background_tasks:
+        if chat_id:
             try:
-                msg_count = get_message_count(chat_id)
+                msg_count = _estimated_message_count(chat_id)
                 # Update summary more frequently in long conversations
                 # Every 5 messages normally, every 3 if > 15 messages
                 trigger_threshold = 3 if msg_count > 15 else 5
                 if msg_count > 0 and msg_count % trigger_threshold == 0:
-                    background_tasks.add_task(summarize_chat_background, chat_id)
+                    asyncio.get_running_loop().run_in_executor(
+                        _SUMMARY_EXECUTOR, summarize_chat_background, chat_id
+                    )
             except Exception:
                 pass
 
@@ -258,11 +412,37 @@ async def list_chats(user_id: Optional[str] = None):
     return get_chats(uid)
 
 
+# Search-as-you-type fires many near-identical queries in quick
+# succession; a tiny TTL cache absorbs them without touching FTS
+_SEARCH_CACHE: dict[tuple[str, str], tuple[float, list]] = {}
+_SEARCH_CACHE_TTL = 30.0
+_SEARCH_CACHE_MAX = 256
+
+
 @app.get("/api/chats/search")
-async def search_chats_endpoint(q: str, user_id: Optional[str] = None):
+async def search_chats_endpoint(
+    q: str, response: Response, user_id: Optional[str] = None
+):
     """Full-text search across chat messages."""
     uid = user_id or config.user_id
-    return search_chats(uid, q)
+    # Let the browser dedupe repeats too
+    response.headers["Cache-Control"] = "max-age=10"
+
+    key = (uid, q.strip().lower())
+    now = time.monotonic()
+    cached = _SEARCH_CACHE.get(key)
+    if cached is not None and now < cached[0]:
+        return cached[1]
+
+    results = search_chats(uid, q)
+    if len(_SEARCH_CACHE) >= _SEARCH_CACHE_MAX:
+        # Drop expired entries first, then oldest-expiry if still full
+        for k in [k for k, (exp, _) in _SEARCH_CACHE.items() if exp <= now]:
+            del _SEARCH_CACHE[k]
+        while len(_SEARCH_CACHE) >= _SEARCH_CACHE_MAX:
+            del _SEARCH_CACHE[min(_SEARCH_CACHE, key=lambda k: _SEARCH_CACHE[k][0])]
+    _SEARCH_CACHE[key] = (now + _SEARCH_CACHE_TTL, results)
+    return results
 
 
 @app.post("/api/chats")
@@ -310,6 +490,36 @@ async def delete_chat_endpoint(chat_id: str, user_id: Optional[str] = None):
 
 # ========== Message Endpoints ==========
 
+# Write-behind message queue: posts are acked immediately and drained in
+# grouped transactions (one BEGIN IMMEDIATE per chat per batch) instead
+# of one SQLite transaction per message. A burst window of 20 ms is
+# below anything a chat client notices.
+_msg_queue: asyncio.Queue = asyncio.Queue()
+_msg_writer_task: Optional[asyncio.Task] = None
+_MSG_FLUSH_WINDOW = 0.02  # seconds
+
+
+def _flush_message_batch(batch: list[tuple[str, str, str]]) -> None:
+    """Group queued messages by chat and insert each group in one txn."""
+    by_chat: dict[str, list[tuple[str, str]]] = {}
+    for chat_id, role, content in batch:
+        by_chat.setdefault(chat_id, []).append((role, content))
+    for chat_id, msgs in by_chat.items():
+        try:
+            bulk_add_messages(chat_id, msgs)
+        except Exception as e:
+            print(f"⚠ Message flush failed for chat {chat_id[:8]}: {e}")
+
+
+async def _message_writer_loop() -> None:
+    """Drain the write-behind queue in bursts."""
+    while True:
+        batch = [await _msg_queue.get()]
+        await asyncio.sleep(_MSG_FLUSH_WINDOW)  # let a burst accumulate
+        while not _msg_queue.empty():
+            batch.append(_msg_queue.get_nowait())
+        await asyncio.to_thread(_flush_message_batch, batch)
+
 
 @app.get("/api/chats/{chat_id}/messages")
 async def get_messages_endpoint(chat_id: str):
@@ -317,10 +527,20 @@ async def get_messages_endpoint(chat_id: str):
     return get_messages(chat_id)
 
 
+@app.post("/api/chats/{chat_id}/resummarize")
+async def resummarize_chat_endpoint(chat_id: str):
+    """Rebuild a chat's rolling summary from scratch (manual repair)."""
+    asyncio.get_running_loop().run_in_executor(
+        _SUMMARY_EXECUTOR, summarize_chat_background, chat_id, True
+    )
+    return {"scheduled": True}
+
+
 @app.post("/api/chats/{chat_id}/messages")
 async def add_message_endpoint(chat_id: str, msg: Message):
-    """Add a message to a chat."""
-    return add_message(chat_id, msg.role, msg.content)
+    """Queue a message for the write-behind batch inserter."""
+    await _msg_queue.put((chat_id, msg.role, msg.content))
+    return {"queued": True}
 
 
 # ========== Memory Endpoints ==========
@@ -330,7 +550,8 @@ async def add_message_endpoint(chat_id: str, msg: Message):
 async def list_memories(user_id: Optional[str] = None):
     """List all stored memories for a user."""
     uid = user_id or config.user_id
-    return get_all_memories(uid)
+    memories, _ = get_all_memories(uid)
+    return memories
 
 
 @app.delete("/api/memories/{memory_id}")
@@ -347,22 +568,40 @@ async def delete_memory_endpoint(memory_id: str):
 
 @app.post("/api/chat")
 async def chat_endpoint(
-    request: ChatRequest,
-    background_tasks: BackgroundTasks,
+    request: Request,
     _auth: None = Depends(verify_api_key),
 ):
     """
     Chat endpoint with SSE streaming.
     Phase 3: Uses 3-tier memory with background summarization.
     """
-    if not request.messages:
+    try:
+        payload = _chat_decoder.decode(await request.body())
+    except msgspec.ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except msgspec.DecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    if not payload.messages:
         raise HTTPException(status_code=400, detail="No messages provided")
 
-    user_id = request.user_id or config.user_id
-    chat_id = request.chat_id
+    # Same constraints the Pydantic Message model enforces elsewhere
+    for m in payload.messages:
+        if m.role not in _MESSAGE_CTOR:
+            raise HTTPException(
+                status_code=422, detail=f"Role must be one of {set(_MESSAGE_CTOR)}"
+            )
+        if len(m.content) > _MAX_MESSAGE_LENGTH:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Message content exceeds maximum length of {_MAX_MESSAGE_LENGTH} characters",
+            )
+
+    user_id = payload.user_id or config.user_id
+    chat_id = payload.chat_id
 
     return StreamingResponse(
-        stream_response(request.messages, user_id, chat_id, background_tasks),
+        stream_response(payload.messages, user_id, chat_id),
         media_type="text/plain; charset=utf-8",
         headers={
             "Cache-Control": "no-cache",
@@ -466,8 +705,26 @@ async def rollback_endpoint(
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
 
     config.validate()
     print("🚀 Starting MeGPT Pro API on http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop + httptools (bundled with uvicorn[standard]) are *nix-only;
+    # the workload is pure I/O so the libuv loop is a free 2-4x on
+    # streaming throughput
+    loop_opts = (
+        {"loop": "uvloop", "http": "httptools"} if sys.platform != "win32" else {}
+    )
+    if config.server_workers > 1:
+        # Multi-worker needs the import-string form; WAL + busy_timeout
+        # on the SQLite side already handle concurrent writers
+        uvicorn.run(
+            "server:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=config.server_workers,
+            **loop_opts,
+        )
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000, **loop_opts)
@@ -3,9 +3,15 @@ Backup Tool - Backup, recovery, and rollback functionality.
 Phase 4: Data protection for SQLite and Qdrant.
 """
 
+import gzip
+import itertools
 import json
 import shutil
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import orjson
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -14,6 +20,15 @@ from dataclasses import dataclass, asdict
 from config import config
 
 
+@lru_cache(maxsize=1)
+def _qdrant():
+    """Shared Qdrant client for all backup helpers: one HTTP session
+    instead of a fresh connection handshake per call."""
+    from qdrant_client import QdrantClient
+
+    return QdrantClient(host=config.qdrant_host, port=config.qdrant_port)
+
+
 @dataclass
 class BackupInfo:
     """Metadata for a backup."""
@@ -49,12 +64,13 @@ def _save_manifest(backups: list[dict]):
 
 
 def _get_db_stats() -> tuple[int, int]:
-    """Get chat and message counts from current database."""
+    """Get chat and message counts via the pooled app connection."""
     try:
-        conn = sqlite3.connect(config.db_path)
-        chat_count = conn.execute("SELECT COUNT(*) FROM chats").fetchone()[0]
-        msg_count = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
-        conn.close()
+        from database import get_connection
+
+        with get_connection() as conn:
+            chat_count = conn.execute("SELECT COUNT(*) FROM chats").fetchone()[0]
+            msg_count = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
         return chat_count, msg_count
     except Exception:
         return 0, 0
@@ -63,66 +79,93 @@ def _get_db_stats() -> tuple[int, int]:
 def _get_memory_count() -> int:
     """Get memory count from Qdrant."""
     try:
-        from qdrant_client import QdrantClient
-
-        client = QdrantClient(host=config.qdrant_host, port=config.qdrant_port)
-        info = client.get_collection(config.qdrant_collection)
+        info = _qdrant().get_collection(config.qdrant_collection)
         return info.points_count or 0
     except Exception:
         return 0
 
 
 def _export_qdrant_vectors(output_path: Path) -> bool:
-    """Export all vectors from Qdrant collection to JSON."""
+    """Export all vectors from Qdrant collection to NDJSON (one point
+    per line), so RAM stays bounded at a single scroll page regardless
+    of collection size."""
     try:
-        from qdrant_client import QdrantClient
-
-        client = QdrantClient(host=config.qdrant_host, port=config.qdrant_port)
-
-        # Scroll through all points
-        all_points = []
-        offset = None
+        client = _qdrant()
 
-        while True:
-            results, offset = client.scroll(
+        def _scroll_page(offset):
+            return client.scroll(
                 collection_name=config.qdrant_collection,
-                limit=100,
+                limit=1000,
                 offset=offset,
                 with_vectors=True,
                 with_payload=True,
             )
 
-            for point in results:
-                all_points.append(
-                    {
-                        "id": str(point.id),
-                        "vector": point.vector,
-                        "payload": point.payload,
-                    }
-                )
+        # Prefetch the next page on a worker thread while the current
+        # one is serialized to disk, so network RTT and disk write
+        # overlap instead of alternating. gzip shrinks text-encoded
+        # float vectors ~4-5x while keeping the line-streaming format.
+        with gzip.open(output_path, "wb") as f, ThreadPoolExecutor(
+            max_workers=1
+        ) as prefetch:
+            future = prefetch.submit(_scroll_page, None)
+            while True:
+                results, offset = future.result()
+                if offset is not None:
+                    future = prefetch.submit(_scroll_page, offset)
+
+                for point in results:
+                    f.write(
+                        orjson.dumps(
+                            {
+                                "id": str(point.id),
+                                "vector": point.vector,
+                                "payload": point.payload,
+                            }
+                        )
+                        + b"\n"
+                    )
+
+                if offset is None:
+                    break
 
-            if offset is None:
-                break
-
-        output_path.write_text(json.dumps(all_points, indent=2))
         return True
     except Exception as e:
         print(f"⚠ Vector export failed: {e}")
         return False
 
 
+def _iter_backup_points(input_path: Path):
+    """Yield point dicts from a vector backup, streaming NDJSON line by
+    line. Handles all three generations of backup file: gzipped NDJSON
+    (current), plain NDJSON, and the original indented JSON array."""
+    with open(input_path, "rb") as raw:
+        magic = raw.read(2)
+    opener = gzip.open if magic == b"\x1f\x8b" else open
+    with opener(input_path, "rb") as f:
+        first = f.read(1)
+        f.seek(0)
+        if first == b"[":
+            yield from json.loads(f.read())
+            return
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
 def _import_qdrant_vectors(input_path: Path) -> bool:
     """Import vectors from JSON back to Qdrant collection."""
     try:
-        from qdrant_client import QdrantClient
         from qdrant_client.http.models import PointStruct, VectorParams, Distance
 
-        client = QdrantClient(host=config.qdrant_host, port=config.qdrant_port)
-
-        # Load points from backup
-        points_data = json.loads(input_path.read_text())
+        client = _qdrant()
 
-        if not points_data:
+        # Stream points from the backup; peek the first to detect the
+        # embedding dimension without loading the whole file
+        points_iter = _iter_backup_points(input_path)
+        try:
+            first_point = next(points_iter)
+        except StopIteration:
             return True  # Nothing to restore
 
         # Recreate collection (drop if exists)
@@ -131,29 +174,50 @@ def _import_qdrant_vectors(input_path: Path) -> bool:
         except Exception:
             pass
 
-        # Detect embedding dimension from first point
         embedding_dim = 768
-        if points_data:
-            first_vector = points_data[0].get("vector")
-            if first_vector:
-                embedding_dim = len(first_vector)
-                print(f"✓ Detected embedding dimension: {embedding_dim}")
+        first_vector = first_point.get("vector")
+        if first_vector:
+            embedding_dim = len(first_vector)
+            print(f"✓ Detected embedding dimension: {embedding_dim}")
 
         client.create_collection(
             collection_name=config.qdrant_collection,
             vectors_config=VectorParams(size=embedding_dim, distance=Distance.COSINE),
         )
 
-        # Insert points in batches
-        batch_size = 100
-        points = [
-            PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"])
-            for p in points_data
-        ]
-
-        for i in range(0, len(points), batch_size):
-            batch = points[i : i + batch_size]
-            client.upsert(collection_name=config.qdrant_collection, points=batch)
+        # Insert in batches, building PointStructs per batch so memory
+        # stays bounded regardless of backup size. wait=False lets the
+        # next batch ship while Qdrant applies the previous one; the
+        # final wait=True upsert fences the whole sequence (updates
+        # apply in submission order per collection).
+        batch_size = 512
+        batch = []
+        last_batch = None
+        for p in itertools.chain([first_point], points_iter):
+            batch.append(
+                PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"])
+            )
+            if len(batch) >= batch_size:
+                if last_batch is not None:
+                    client.upsert(
+                        collection_name=config.qdrant_collection,
+                        points=last_batch,
+                        wait=False,
+                    )
+                last_batch = batch
+                batch = []
+        if last_batch is not None and batch:
+            client.upsert(
+                collection_name=config.qdrant_collection,
+                points=last_batch,
+                wait=False,
+            )
+            last_batch = None
+        client.upsert(
+            collection_name=config.qdrant_collection,
+            points=batch or last_batch,
+            wait=True,
+        )
 
         return True
     except Exception as e:
@@ -183,15 +247,17 @@ def create_backup(description: str = "") -> Optional[BackupInfo]:
         db_backup_path = config.backups_dir / db_backup_name
 
         if config.db_path.exists():
-            # Checkpoint WAL to ensure all data is in main file
+            # VACUUM INTO writes a page-compacted, transactionally
+            # consistent copy in one statement - WAL content included,
+            # free pages dropped, no file-copy race with live writers
             conn = sqlite3.connect(config.db_path)
-            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
-            conn.close()
-
-            shutil.copy2(config.db_path, db_backup_path)
+            try:
+                conn.execute("VACUUM INTO ?", (str(db_backup_path),))
+            finally:
+                conn.close()
 
         # Backup Qdrant vectors
-        vectors_backup_name = f"{backup_id}_vectors.json"
+        vectors_backup_name = f"{backup_id}_vectors.ndjson.gz"
         vectors_backup_path = config.backups_dir / vectors_backup_name
         vectors_exported = _export_qdrant_vectors(vectors_backup_path)
 
@@ -215,16 +281,13 @@ def create_backup(description: str = "") -> Optional[BackupInfo]:
         manifest = _load_manifest()
         manifest.insert(0, asdict(backup))
 
-        # Enforce retention limit
+        # Enforce retention limit; unlink(missing_ok=True) is one
+        # syscall per file and has no exists/unlink race
         if len(manifest) > config.backup_retention_count:
-            # Remove old backups
             for old in manifest[config.backup_retention_count :]:
-                old_db = config.backups_dir / old.get("db_file", "")
-                old_vec = config.backups_dir / old.get("vectors_file", "")
-                if old_db.exists():
-                    old_db.unlink()
-                if old_vec.exists():
-                    old_vec.unlink()
+                for name in (old.get("db_file"), old.get("vectors_file")):
+                    if name:
+                        (config.backups_dir / name).unlink(missing_ok=True)
             manifest = manifest[: config.backup_retention_count]
 
         _save_manifest(manifest)
@@ -271,7 +334,14 @@ def restore_backup(backup_id: str) -> bool:
         # Restore SQLite
         db_backup_path = config.backups_dir / backup["db_file"]
         if db_backup_path.exists():
-            # Close any connections and replace file
+            # Fold the live WAL into the main file first so a stale
+            # -wal sidecar can't shadow the restored pages
+            try:
+                conn = sqlite3.connect(config.db_path)
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.close()
+            except Exception:
+                pass
             shutil.copy2(db_backup_path, config.db_path)
             print(f"✓ Database restored from {backup['db_file']}")
 
@@ -4,11 +4,23 @@ Uses local embeddings via LM Studio's embedding endpoint.
 Phase 4: Environment-aware collection names.
 """
 
+import atexit
+import hashlib
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
 import uuid
-import json
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 import httpx
+import numpy as np
+import orjson
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
     VectorParams,
@@ -17,10 +29,37 @@ from qdrant_client.http.models import (
     Filter,
     FieldCondition,
     MatchValue,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    QuantizationSearchParams,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
 )
 
 from config import config
 
+# Persistent HTTP clients: keep-alive connections to the LLM and the
+# embedder are reused across calls instead of paying a fresh TCP
+# handshake for every extraction/embedding
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+_llm_http = httpx.Client(
+    headers={"Authorization": f"Bearer {config.llm_api_key}"},
+    timeout=30.0,
+    limits=_HTTP_LIMITS,
+)
+_embed_http = httpx.Client(
+    headers={"Authorization": f"Bearer {config.embedder_api_key}"},
+    timeout=30.0,
+    limits=_HTTP_LIMITS,
+)
+atexit.register(_llm_http.close)
+atexit.register(_embed_http.close)
+
 # Constants - Phase 4: Use config for environment-aware collection
 DEFAULT_EMBEDDING_DIM = 768  # nomic-embed-text dimension
 _detected_embedding_dim = None
@@ -28,20 +67,38 @@ _detected_embedding_dim = None
 
 def _get_embedding_dim() -> int:
     """
-    Dynamically detect embedding dimension from the model.
+    Resolve the embedding dimension: config override, then the on-disk
+    cache from a previous run, then a one-time probe of the model.
     Returns detected dimension or default if detection fails.
     """
     global _detected_embedding_dim
 
+    if config.embedding_dim:
+        return config.embedding_dim
+
     if _detected_embedding_dim is not None:
         return _detected_embedding_dim
 
+    # Reuse the dimension probed on a previous startup so only the very
+    # first run pays the embedding round trip
+    dim_cache = config.data_dir / ".embed_dim"
+    try:
+        _detected_embedding_dim = int(dim_cache.read_text())
+        return _detected_embedding_dim
+    except (OSError, ValueError):
+        pass
+
     try:
         # Try to detect dimension by embedding a test string
         test_embedding = _get_embedding("test")
-        if test_embedding:
+        if test_embedding is not None:
             _detected_embedding_dim = len(test_embedding)
             print(f"✓ Detected embedding dimension: {_detected_embedding_dim}")
+            try:
+                dim_cache.parent.mkdir(parents=True, exist_ok=True)
+                dim_cache.write_text(str(_detected_embedding_dim))
+            except OSError:
+                pass
             return _detected_embedding_dim
     except Exception as e:
         print(f"⚠ Could not detect embedding dimension: {e}")
@@ -54,20 +111,70 @@ def _get_embedding_dim() -> int:
 _qdrant_client: Optional[QdrantClient] = None
 
 
+# Chit-chat turns where the LLM would just answer NONE anyway; a regex
+# check is ~6 orders of magnitude cheaper than the extraction call
+_TRIVIAL = re.compile(
+    r"^\s*(ok|okay|thanks|thank you|cool|nice|lol|hi|hello|hey|bye|yes|no|sure)[\s.!?]*$",
+    re.IGNORECASE,
+)
+
+# Dedupe regenerated/retried turns without keeping the full strings alive
+_FACT_CACHE: dict[tuple[int, int], str] = {}
+_FACT_CACHE_MAX = 1024
+
+
+def _stream_fact_completion(request_json: dict) -> str:
+    """
+    Run a completion with stream=True and stop as soon as the output is
+    provably "NONE" - the common case for chit-chat turns - so the model
+    never generates the remaining tokens. Raises on any failure so the
+    caller can fall back to a plain request.
+    """
+    acc = ""
+    with _llm_http.stream(
+        "POST",
+        f"{config.llm_base_url}/chat/completions",
+        json={**request_json, "stream": True},
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[6:]
+            if data == "[DONE]":
+                break
+            delta = orjson.loads(data)["choices"][0].get("delta", {})
+            acc += delta.get("content") or ""
+            # While the stripped output is still a prefix of "NONE" keep
+            # reading; the moment it completes "NONE", abort generation
+            if acc.strip().upper().startswith("NONE"):
+                return ""
+    return acc.strip()
+
+
 def _extract_facts(user_input: str, ai_response: str) -> str:
     """
     Extract important facts from conversation using LLM.
     Returns extracted facts or empty string if extraction fails.
     """
-    try:
-        response = httpx.post(
-            f"{config.llm_base_url}/chat/completions",
-            json={
-                "model": config.llm_model_name,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"""Extract the most important fact(s) from this conversation.
+    if (
+        len(user_input.strip()) < 15
+        and _TRIVIAL.match(user_input)
+        and len(ai_response) < 200
+    ):
+        return ""
+
+    cache_key = (hash(user_input), hash(ai_response))
+    cached = _FACT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    request_json = {
+        "model": config.llm_model_name,
+        "messages": [
+            {
+                "role": "user",
+                "content": f"""Extract the most important fact(s) from this conversation.
 
 USER: {user_input}
 ASSISTANT: {ai_response}
@@ -78,22 +185,31 @@ Instructions:
 - If no important facts, output: NONE
 - Examples of good facts: "User prefers dark mode", "User is working on a React project"
 - Do NOT extract conversational filler like "thanks", "ok", etc.""",
-                    }
-                ],
-                "max_tokens": 100,
-                "temperature": 0.2,
-            },
-            headers={"Authorization": f"Bearer {config.llm_api_key}"},
-            timeout=30.0,
-        )
-        response.raise_for_status()
-        result = response.json()
-        fact = result["choices"][0]["message"]["content"].strip()
+            }
+        ],
+        "max_tokens": 100,
+        "temperature": 0.2,
+    }
 
-        if fact and fact.upper() != "NONE":
-            return fact
+    try:
+        try:
+            fact = _stream_fact_completion(request_json)
+        except Exception:
+            # Endpoint may not support streaming - pay the full completion
+            response = _llm_http.post(
+                f"{config.llm_base_url}/chat/completions", json=request_json
+            )
+            response.raise_for_status()
+            result = response.json()
+            fact = result["choices"][0]["message"]["content"].strip()
 
-        return ""
+        if not fact or fact.upper() == "NONE":
+            fact = ""
+
+        if len(_FACT_CACHE) >= _FACT_CACHE_MAX:
+            _FACT_CACHE.pop(next(iter(_FACT_CACHE)))
+        _FACT_CACHE[cache_key] = fact
+        return fact
     except Exception as e:
         print(f"⚠ Fact extraction failed: {e}")
         return ""
@@ -104,9 +220,14 @@ def get_qdrant_client() -> Optional[QdrantClient]:
     global _qdrant_client
     if _qdrant_client is None:
         try:
+            # gRPC skips HTTP framing and JSON encoding on every search
+            # and upsert; the client transparently falls back to REST for
+            # operations the gRPC API doesn't cover
             _qdrant_client = QdrantClient(
                 host=config.qdrant_host,
                 port=config.qdrant_port,
+                grpc_port=config.qdrant_grpc_port,
+                prefer_grpc=True,
             )
             # Ensure collection exists
             _ensure_collection()
@@ -124,48 +245,85 @@ def _ensure_collection():
         return
 
     try:
-        collections = client.get_collections().collections
-        exists = any(c.name == config.qdrant_collection for c in collections)
+        # Targeted existence check instead of listing every collection
+        if not client.collection_exists(config.qdrant_collection):
+            # Binary quantization keeps 1-bit vectors in RAM (32x smaller than
+            # float32); search is popcount-based with rescoring on originals.
+            # Scalar int8 is the middle ground: 4x smaller, SIMD dot products,
+            # noticeably better pre-rescore recall than binary
+            quantization = None
+            if config.qdrant_quantization == "binary":
+                quantization = BinaryQuantization(
+                    binary=BinaryQuantizationConfig(always_ram=True)
+                )
+            elif config.qdrant_quantization == "scalar":
+                quantization = ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(
+                        type=ScalarType.INT8,
+                        quantile=0.99,  # clip outliers for tighter int8 range
+                        always_ram=True,
+                    )
+                )
 
-        if not exists:
+            dim = _get_embedding_dim()
             client.create_collection(
                 collection_name=config.qdrant_collection,
                 vectors_config=VectorParams(
-                    size=_get_embedding_dim(),
+                    size=dim,
                     distance=Distance.COSINE,
                 ),
+                quantization_config=quantization,
+                # Personal memory is write-once/read-often: a denser graph
+                # (m=32, ef_construct=200) buys recall so runtime ef can
+                # stay low, and payloads live on disk to keep RAM for the
+                # index itself
+                hnsw_config=HnswConfigDiff(m=32, ef_construct=200),
+                on_disk_payload=True,
+                optimizers_config=OptimizersConfigDiff(default_segment_number=2),
             )
-            print(
-                f"✓ Created collection: {config.qdrant_collection} (dim: {_get_embedding_dim()})"
-            )
+            print(f"✓ Created collection: {config.qdrant_collection} (dim: {dim})")
+
+            # Every search and cascade-delete filters on these keys; a
+            # keyword index turns that from a linear payload scan into a
+            # lookup. Idempotent, so reruns are harmless.
+            for field in ("user_id", "chat_id"):
+                try:
+                    client.create_payload_index(
+                        collection_name=config.qdrant_collection,
+                        field_name=field,
+                        field_schema=PayloadSchemaType.KEYWORD,
+                    )
+                except Exception as e:
+                    print(f"⚠ Payload index on {field} failed: {e}")
     except Exception as e:
         print(f"⚠ Collection check/create failed: {e}")
 
 
-def _get_embedding(text: str) -> Optional[list[float]]:
+def _get_embedding(text: str) -> Optional[np.ndarray]:
     """Get embedding from local LM Studio embedding endpoint with retry."""
-    import time
-
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            response = httpx.post(
+            response = _embed_http.post(
                 f"{config.embedder_base_url}/embeddings",
                 json={
                     "model": config.embedder_model_name,
                     "input": text,
                 },
-                headers={"Authorization": f"Bearer {config.embedder_api_key}"},
-                timeout=30.0,
             )
             response.raise_for_status()
             data = response.json()
-            return data["data"][0]["embedding"]
+            # float32 ndarray: ~9x less memory than a list of PyObject
+            # floats, and qdrant-client marshals it without re-iterating
+            return np.asarray(data["data"][0]["embedding"], dtype=np.float32)
         except Exception as e:
             if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 2  # 2, 4, 6 seconds
+                # Exponential backoff (0.5s, 1s, capped at 8s) with jitter
+                # so concurrent workers don't retry in lockstep; this runs
+                # on worker threads, so a blocking sleep is fine
+                wait_time = min(8.0, 0.5 * 2**attempt) + random.random() * 0.25
                 print(
-                    f"⚠ Embedding attempt {attempt + 1} failed, retrying in {wait_time}s..."
+                    f"⚠ Embedding attempt {attempt + 1} failed, retrying in {wait_time:.1f}s..."
                 )
                 time.sleep(wait_time)
             else:
@@ -174,9 +332,185 @@ def _get_embedding(text: str) -> Optional[list[float]]:
     return None
 
 
+# ========== Persistent Embedding Cache ==========
+# Disk tier under the in-memory LRU, so frequent queries survive restarts
+
+_EMB_CACHE_TTL_SECONDS = 7 * 24 * 3600
+_emb_cache_initialized = False
+
+
+def _emb_cache_connect() -> sqlite3.Connection:
+    """Open the on-disk embedding cache, creating the schema on first use."""
+    global _emb_cache_initialized
+    config.data_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(config.data_dir / "embedding_cache.db")
+    if not _emb_cache_initialized:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb_cache "
+            "(hash TEXT PRIMARY KEY, vec BLOB, ts INTEGER)"
+        )
+        # Purge expired entries once per process
+        conn.execute(
+            "DELETE FROM emb_cache WHERE ts < ?",
+            (int(time.time()) - _EMB_CACHE_TTL_SECONDS,),
+        )
+        conn.commit()
+        _emb_cache_initialized = True
+    return conn
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _emb_cache_get(text: str) -> Optional[np.ndarray]:
+    """Look up a persisted embedding by text hash."""
+    try:
+        conn = _emb_cache_connect()
+        try:
+            row = conn.execute(
+                "SELECT vec FROM emb_cache WHERE hash = ? AND ts >= ?",
+                (_text_hash(text), int(time.time()) - _EMB_CACHE_TTL_SECONDS),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        # frombuffer is zero-copy; the result is read-only, which also
+        # protects the in-memory LRU entry from accidental mutation
+        return np.frombuffer(row[0], dtype=np.float32)
+    except Exception as e:
+        print(f"⚠ Embedding cache read failed: {e}")
+        return None
+
+
+def _emb_cache_put(text: str, embedding: np.ndarray) -> None:
+    """Persist an embedding as a packed float32 BLOB."""
+    try:
+        conn = _emb_cache_connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO emb_cache (hash, vec, ts) VALUES (?, ?, ?)",
+                (
+                    _text_hash(text),
+                    np.asarray(embedding, dtype=np.float32).tobytes(),
+                    int(time.time()),
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"⚠ Embedding cache write failed: {e}")
+
+
+@lru_cache(maxsize=1024)
+def _embed_query_cached(text: str) -> np.ndarray:
+    """Memoized embed - raises on failure so errors are never cached."""
+    # Disk tier first: survives restarts, costs one local SQLite read
+    cached = _emb_cache_get(text)
+    if cached is not None:
+        return cached
+
+    embedding = _get_embedding(text)
+    if embedding is None:
+        raise RuntimeError("Embedding endpoint unavailable")
+
+    _emb_cache_put(text, embedding)
+    embedding.flags.writeable = False  # shared via the LRU
+    return embedding
+
+
+def embed_query(text: str) -> Optional[np.ndarray]:
+    """
+    Embed a query string, memoizing repeat encodes in-process.
+
+    The same user query is embedded by both the semantic cache lookup and
+    Tier-2 facts retrieval each turn; the LRU collapses those (and exact
+    repeat queries) into a single forward pass on the embedder.
+    """
+    try:
+        return _embed_query_cached(text)
+    except Exception as e:
+        print(f"⚠ Query embedding failed: {e}")
+        return None
+
+
+class SemanticQueryCache:
+    """
+    Process-local semantic cache for retrieved facts.
+    Users iteratively rephrase the same question; when a query embedding is
+    close enough to a recent one, the cached facts string is reused instead
+    of paying another Qdrant round trip.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        threshold: float = 0.92,
+        ttl_seconds: float = 300.0,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Entries: (normalized vec, user_id, facts, monotonic ts)
+        self._entries: list[tuple] = []
+
+    @staticmethod
+    def _normalize(vec: np.ndarray) -> Optional[np.ndarray]:
+        arr = np.asarray(vec, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        if norm == 0:
+            return None
+        return arr / norm
+
+    def get(self, query_vec: np.ndarray, user_id: str) -> Optional[str]:
+        """Return cached facts for a near-duplicate query, or None."""
+        q = self._normalize(query_vec)
+        if q is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            self._entries = [
+                e for e in self._entries if now - e[3] <= self.ttl_seconds
+            ]
+            candidates = [e for e in self._entries if e[1] == user_id]
+            if not candidates:
+                return None
+
+            # Pre-normalized vectors: cosine similarity is one matrix-vector dot
+            sims = np.stack([e[0] for e in candidates]) @ q
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                return candidates[best][2]
+
+        return None
+
+    def put(self, query_vec: np.ndarray, user_id: str, facts: str) -> None:
+        """Cache the facts retrieved for a query."""
+        q = self._normalize(query_vec)
+        if q is None:
+            return
+
+        with self._lock:
+            self._entries.append((q, user_id, facts, time.monotonic()))
+            if len(self._entries) > self.max_entries:
+                del self._entries[0]
+
+
+_query_cache = SemanticQueryCache()
+
+# Interned: built once at import, shared by every formatted context
+_MEM_PREFIX = sys.intern("Here is what you remember about this user:\n")
+
+
 def retrieve_context(query: str, user_id: str | None = None) -> str:
     """
     Search memory for relevant context based on the query.
+    Near-duplicate queries are served from a process-local semantic cache.
 
     Args:
         query: The user's current message/question
@@ -195,45 +529,188 @@ def retrieve_context(query: str, user_id: str | None = None) -> str:
     try:
         print(f"🔍 Searching memories for user {user_id}...")
 
-        # Get query embedding
-        query_embedding = _get_embedding(query)
+        # Get query embedding (memoized for repeat queries)
+        query_embedding = embed_query(query)
         if query_embedding is None:
             return ""
 
-        # Search in Qdrant using query_points (newer API)
-        from qdrant_client.http.models import QueryRequest
+        # Near-duplicate query? Reuse the cached facts, skip Qdrant
+        cached_facts = _query_cache.get(query_embedding, user_id)
+        if cached_facts is not None:
+            print("  Semantic query cache hit")
+            return cached_facts
 
+        # Search in Qdrant using query_points (newer API)
         results = client.query_points(
             collection_name=config.qdrant_collection,
             query=query_embedding,
             query_filter=Filter(
                 must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]
             ),
-            limit=5,
-            with_payload=True,
+            limit=10,
+            # Server-side threshold: HNSW prunes low-relevance candidates
+            # and never serializes their payloads over the wire
+            score_threshold=0.5,
+            # Only the memory text is formatted into context; skip
+            # shipping user_input/chat_id/type/created_at per hit
+            with_payload=["memory"],
+            search_params=SearchParams(
+                hnsw_ef=64,  # dense graph keeps recall high at low ef
+                quantization=QuantizationSearchParams(rescore=True, oversampling=2.0),
+            ),
         )
 
         if not results or not results.points:
             print("  No memories found")
+            _query_cache.put(query_embedding, user_id, "")
             return ""
 
-        # Format memories as context
-        memories = []
-        for hit in results.points:
-            if hit.score and hit.score > 0.5:  # Only include relevant memories
-                memories.append(f"- {hit.payload.get('memory', '')}")
-
-        if memories:
-            print(f"  Found {len(memories)} memories")
-            return "Here is what you remember about this user:\n" + "\n".join(memories)
-
-        print("  No relevant memories found")
-        return ""
+        # Format memories as context (already relevance-filtered by Qdrant)
+        print(f"  Found {len(results.points)} memories")
+        facts = _MEM_PREFIX + "\n".join(
+            f"- {hit.payload.get('memory', '')}" for hit in results.points
+        )
+        _query_cache.put(query_embedding, user_id, facts)
+        return facts
     except Exception as e:
         print(f"⚠ Memory search failed: {e}")
         return ""
 
 
+# ========== Write-Behind Buffer ==========
+# Interactions are queued and flushed in batches: one batched embedding call
+# and one bulk Qdrant upsert per flush instead of one RTT pair per turn.
+
+_WRITE_BATCH_SIZE = 16
+_WRITE_MAX_WAIT = 0.2  # Seconds to wait for more writes before flushing
+
+_write_queue: queue.Queue = queue.Queue()
+_writer_lock = threading.Lock()
+_writer_started = False
+
+
+def _get_embeddings_batch(texts: list[str]) -> Optional[list[list[float]]]:
+    """Embed several texts in a single embedder call."""
+    try:
+        response = _embed_http.post(
+            f"{config.embedder_base_url}/embeddings",
+            json={
+                "model": config.embedder_model_name,
+                "input": texts,
+            },
+            timeout=60.0,
+        )
+        response.raise_for_status()
+        data = response.json()
+        # The API may return items out of order; sort by index
+        items = sorted(data["data"], key=lambda d: d.get("index", 0))
+        return [item["embedding"] for item in items]
+    except Exception as e:
+        print(f"⚠ Batch embedding failed: {e}")
+        return None
+
+
+def _flush_batch(batch: list[tuple]) -> None:
+    """Extract facts, batch-embed, and bulk-upsert one batch of writes."""
+    client = get_qdrant_client()
+    if client is None:
+        print("⚠ Memory client not available, dropping batch")
+        return
+
+    try:
+        # Fact extractions are independent LLM calls; run them in
+        # parallel so the batch costs one extraction latency, not the sum
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            facts = list(
+                pool.map(lambda item: _extract_facts(item[0], item[1]), batch)
+            )
+
+        records = []
+        for (user_input, ai_response, user_id, chat_id), fact_text in zip(
+            batch, facts
+        ):
+            is_extracted = bool(fact_text) and not fact_text.startswith("User said:")
+
+            if not fact_text:
+                # Fallback to transcript if extraction fails
+                fact_text = (
+                    f"User said: {user_input}\nAssistant responded: {ai_response}"
+                )
+                is_extracted = False
+
+            records.append((fact_text, is_extracted, user_input, user_id, chat_id))
+
+        embeddings = _get_embeddings_batch([r[0] for r in records])
+        if embeddings is None or len(embeddings) != len(records):
+            return
+
+        # One timestamp per batch: the writes landed together, and this
+        # skips a datetime allocation + format per point
+        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        points = [
+            PointStruct(
+                id=uuid.uuid4().hex,
+                vector=embedding,
+                payload={
+                    "user_id": user_id,
+                    "chat_id": chat_id,
+                    "memory": fact_text,
+                    "user_input": user_input,
+                    "type": "extracted_fact" if is_extracted else "transcript",
+                    "created_at": now_iso,
+                },
+            )
+            for (fact_text, is_extracted, user_input, user_id, chat_id), embedding
+            in zip(records, embeddings)
+        ]
+
+        client.upsert(collection_name=config.qdrant_collection, points=points)
+        print(f"✓ Flushed {len(points)} memory write(s)")
+    except Exception as e:
+        print(f"⚠ Memory batch flush failed: {e}")
+
+
+def _flush_loop() -> None:
+    """Worker: drain the queue in batches of up to _WRITE_BATCH_SIZE."""
+    while True:
+        batch = [_write_queue.get()]
+
+        # Collect more writes for a short window to amortize the flush
+        deadline = time.monotonic() + _WRITE_MAX_WAIT
+        while len(batch) < _WRITE_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(_write_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        _flush_batch(batch)
+        for _ in batch:
+            _write_queue.task_done()
+
+
+def _ensure_writer() -> None:
+    """Start the flush worker thread on first write."""
+    global _writer_started
+    with _writer_lock:
+        if not _writer_started:
+            threading.Thread(
+                target=_flush_loop, daemon=True, name="memory-writer"
+            ).start()
+            _writer_started = True
+
+
+def _drain_on_exit() -> None:
+    """Flush queued writes before interpreter shutdown."""
+    if _writer_started and not _write_queue.empty():
+        _write_queue.join()
+
+
+atexit.register(_drain_on_exit)
+
+
 def save_interaction(
     user_input: str,
     ai_response: str,
@@ -241,8 +718,10 @@ def save_interaction(
     chat_id: str | None = None,
 ) -> None:
     """
-    Save the interaction to memory for future recall.
-    Now extracts facts using the LLM for better recall.
+    Queue the interaction for memory storage.
+    Writes are flushed in batches by a background worker, which extracts
+    facts with the LLM, embeds the whole batch in one call, and performs a
+    single bulk Qdrant upsert.
 
     Args:
         user_input: The user's message
@@ -251,50 +730,8 @@ def save_interaction(
         chat_id: Optional chat ID for cascading delete
     """
     user_id = user_id or config.user_id
-    client = get_qdrant_client()
-
-    if client is None:
-        print("⚠ Memory client not available, skipping save")
-        return
-
-    try:
-        # Extract facts using LLM for better memory quality
-        fact_text = _extract_facts(user_input, ai_response)
-
-        # Check if extraction succeeded (got a fact, not just transcript)
-        is_extracted = bool(fact_text) and not fact_text.startswith("User said:")
-
-        if not fact_text:
-            # Fallback to transcript if extraction fails
-            fact_text = f"User said: {user_input}\nAssistant responded: {ai_response}"
-            is_extracted = False
-
-        # Get embedding
-        embedding = _get_embedding(fact_text)
-        if embedding is None:
-            return
-
-        # Create point
-        point_id = str(uuid.uuid4())
-        point = PointStruct(
-            id=point_id,
-            vector=embedding,
-            payload={
-                "user_id": user_id,
-                "chat_id": chat_id,
-                "memory": fact_text,
-                "user_input": user_input,
-                "type": "extracted_fact" if is_extracted else "transcript",
-                "created_at": datetime.utcnow().isoformat(),
-            },
-        )
-
-        print(f"💾 Saving memory for user {user_id}...")
-        client.upsert(collection_name=config.qdrant_collection, points=[point])
-        print(f"✓ Memory saved: {point_id}")
-
-    except Exception as e:
-        print(f"⚠ Memory save failed: {e}")
+    _ensure_writer()
+    _write_queue.put((user_input, ai_response, user_id, chat_id))
 
 
 def add_memory(fact: str, user_id: str | None = None) -> None:
@@ -305,59 +742,92 @@ def add_memory(fact: str, user_id: str | None = None) -> None:
         fact: The fact to remember
         user_id: Optional user identifier
     """
+    if add_memories([fact], user_id):
+        print(f"✓ Added memory: {fact[:50]}...")
+
+
+def add_memories(facts: list[str], user_id: str | None = None) -> int:
+    """
+    Add several facts to memory in bulk: one embedder call per 64 facts
+    and one upsert per chunk, instead of a round-trip pair per fact.
+
+    Args:
+        facts: The facts to remember
+        user_id: Optional user identifier
+
+    Returns:
+        Number of facts stored
+    """
     user_id = user_id or config.user_id
     client = get_qdrant_client()
 
-    if client is None:
-        return
+    if client is None or not facts:
+        return 0
 
+    stored = 0
     try:
-        embedding = _get_embedding(fact)
-        if embedding is None:
-            return
-
-        point_id = str(uuid.uuid4())
-        point = PointStruct(
-            id=point_id,
-            vector=embedding,
-            payload={
-                "user_id": user_id,
-                "memory": fact,
-                "created_at": datetime.utcnow().isoformat(),
-            },
-        )
+        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        for start in range(0, len(facts), 64):
+            chunk = facts[start : start + 64]
+            embeddings = _get_embeddings_batch(chunk)
+            if embeddings is None or len(embeddings) != len(chunk):
+                continue
+
+            points = [
+                PointStruct(
+                    id=uuid.uuid4().hex,
+                    vector=embedding,
+                    payload={
+                        "user_id": user_id,
+                        "memory": fact,
+                        "created_at": now_iso,
+                    },
+                )
+                for fact, embedding in zip(chunk, embeddings)
+            ]
+            client.upsert(collection_name=config.qdrant_collection, points=points)
+            stored += len(points)
 
-        client.upsert(collection_name=config.qdrant_collection, points=[point])
-        print(f"✓ Added memory: {fact[:50]}...")
+        return stored
     except Exception as e:
-        print(f"⚠ Memory add failed: {e}")
+        print(f"⚠ Bulk memory add failed: {e}")
+        return stored
 
 
-def get_all_memories(user_id: str | None = None) -> list[dict]:
+def get_all_memories(
+    user_id: str | None = None,
+    limit: int = 100,
+    offset=None,
+    fields: tuple[str, ...] = ("memory", "created_at", "chat_id", "user_input"),
+) -> tuple[list[dict], Optional[str]]:
     """
-    Get all stored memories for a user.
+    Get a page of stored memories for a user.
 
     Args:
         user_id: Optional user identifier
+        limit: Page size
+        offset: Opaque cursor from a previous page (None for the first)
+        fields: Payload fields to fetch; trimming this cuts the bytes
+            Qdrant serializes per point
 
     Returns:
-        List of memory dictionaries
+        (memory dictionaries, cursor for the next page or None)
     """
     user_id = user_id or config.user_id
     client = get_qdrant_client()
 
     if client is None:
-        return []
+        return [], None
 
     try:
-        # Scroll through all points for this user
-        results, _ = client.scroll(
+        results, next_offset = client.scroll(
             collection_name=config.qdrant_collection,
             scroll_filter=Filter(
                 must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]
             ),
-            limit=100,
-            with_payload=True,
+            limit=limit,
+            offset=offset,
+            with_payload=list(fields),
         )
 
         memories = []
@@ -374,10 +844,31 @@ def get_all_memories(user_id: str | None = None) -> list[dict]:
                 }
             )
 
-        return memories
+        return memories, str(next_offset) if next_offset is not None else None
     except Exception as e:
         print(f"⚠ Memory get_all failed: {e}")
-        return []
+        return [], None
+
+
+def count_memories(user_id: str | None = None) -> int:
+    """Count stored memories for a user without fetching any payloads."""
+    user_id = user_id or config.user_id
+    client = get_qdrant_client()
+
+    if client is None:
+        return 0
+
+    try:
+        return client.count(
+            collection_name=config.qdrant_collection,
+            count_filter=Filter(
+                must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]
+            ),
+            exact=False,
+        ).count
+    except Exception as e:
+        print(f"⚠ Memory count failed: {e}")
+        return 0
 
 
 def delete_memory(memory_id: str) -> bool:
@@ -424,30 +915,30 @@ def delete_memories_for_chat(chat_id: str, user_id: str | None = None) -> int:
         return 0
 
     try:
-        # Get all memories for this chat
-        results, _ = client.scroll(
-            collection_name=config.qdrant_collection,
-            scroll_filter=Filter(
-                must=[
-                    FieldCondition(key="user_id", match=MatchValue(value=user_id)),
-                    FieldCondition(key="chat_id", match=MatchValue(value=chat_id)),
-                ]
-            ),
-            limit=100,
-            with_payload=False,
+        chat_filter = Filter(
+            must=[
+                FieldCondition(key="user_id", match=MatchValue(value=user_id)),
+                FieldCondition(key="chat_id", match=MatchValue(value=chat_id)),
+            ]
         )
 
-        if not results:
+        # Count first (for the return value), then delete server-side by
+        # filter: one round trip, no 100-point scroll cap, no id shuttling
+        count = client.count(
+            collection_name=config.qdrant_collection,
+            count_filter=chat_filter,
+            exact=True,
+        ).count
+
+        if not count:
             return 0
 
-        # Delete all matching points
-        point_ids = [str(point.id) for point in results]
         client.delete(
             collection_name=config.qdrant_collection,
-            points_selector=point_ids,
+            points_selector=chat_filter,
         )
 
-        return len(point_ids)
+        return count
     except Exception as e:
         print(f"⚠ Cascading memory delete failed: {e}")
         return 0
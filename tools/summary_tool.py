@@ -2,89 +2,253 @@
 Summary Tool - Background summarization for Phase 3 rolling memory.
 Generates concise summaries of conversations to maintain context without token explosion.
 """
+import atexit
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 import httpx
+import orjson
 from config import config
 import database as db
 
+# Keep-alive client shared by all summarization calls; each fold reuses
+# the pooled connection instead of a fresh TCP handshake
+_llm_http = httpx.Client(
+    headers={"Authorization": f"Bearer {config.llm_api_key}"},
+    timeout=60.0,
+    limits=httpx.Limits(max_keepalive_connections=10),
+)
+atexit.register(_llm_http.close)
+
+# Memoize the last fold per chat: a rebuild or retried trigger that sees
+# the exact same (summary, new messages) input reuses the prior result
+# instead of paying another LLM round trip
+_FOLD_CACHE: dict[str, tuple[str, str]] = {}
+_FOLD_CACHE_MAX = 256
+
+# Instructions come first and byte-identical on every call so the LLM
+# server's KV prefix cache can reuse their prefill across chats; all
+# dynamic content sits strictly after the sentinel. Don't reword or
+# re-whitespace casually - any byte change invalidates the cached prefix.
+_SUMMARY_PREFIX = (
+    "You are a Memory Manager. Update the conversation summary based on new messages.\n"
+    "\n"
+    "Instructions:\n"
+    "- Output a concise paragraph (max 150 words) capturing the key context\n"
+    "- Include important facts, preferences, and ongoing topics\n"
+    "- Do NOT output a conversational response\n"
+    "- Just output the summary text, nothing else\n"
+    "\n"
+    "<<<BEGIN_DATA>>>\n"
+    "[OLD SUMMARY]:\n"
+)
 
-def summarize_chat_background(chat_id: str) -> None:
+
+def _stream_summary_completion(body: dict) -> str:
+    """
+    Run the summary completion with stream=True, accumulating delta text
+    as tokens land instead of idling on the socket until the full JSON
+    body arrives. Raises on failure so the caller can fall back.
     """
-    Reads recent messages and the current summary, then generates a new 
-    condensed summary. Updates the 'chats' table in SQLite.
-    
+    buf = []
+    with _llm_http.stream(
+        "POST",
+        f"{config.llm_base_url}/chat/completions",
+        content=orjson.dumps({**body, "stream": True}),
+        headers={"Content-Type": "application/json"},
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[6:]
+            if data == "[DONE]":
+                break
+            delta = orjson.loads(data)["choices"][0].get("delta", {})
+            piece = delta.get("content")
+            if piece:
+                buf.append(piece)
+    return "".join(buf).strip()
+
+
+def summarize_chat_background(chat_id: str, full_rebuild: bool = False) -> None:
+    """
+    Folds messages newer than the last summarized one into the rolling
+    summary and updates the 'chats' table in SQLite. Incremental: only
+    genuinely new turns reach the LLM, so cost stays constant per
+    trigger instead of growing with chat length.
+
     This should be called as a background task to avoid blocking the chat response.
-    
+
     Args:
         chat_id: The chat ID to summarize
+        full_rebuild: Discard the old summary and re-summarize from the
+            recent window (manual repair path)
     """
     try:
         # 1. Fetch current data
-        current_summary = db.get_summary(chat_id)
-        recent_history = db.get_recent_messages_text(chat_id, limit=20)
-        
+        if full_rebuild:
+            current_summary, last_seen = "", 0
+        else:
+            current_summary, last_seen = db.get_summary_state(chat_id)
+        recent_history, last_id = db.get_new_messages_text(chat_id, last_seen)
+
         if not recent_history:
-            return  # No messages to summarize
+            return  # Nothing new to summarize
+
+        fold_key = hashlib.sha256(
+            f"{current_summary}\x00{recent_history}".encode("utf-8")
+        ).hexdigest()
+        cached = _FOLD_CACHE.get(chat_id)
+        if cached is not None and cached[0] == fold_key:
+            db.update_summary(chat_id, cached[1], last_id)
+            return
+
+        # 2. Build prompt: stable prefix + dynamic tail
+        prompt = (
+            _SUMMARY_PREFIX
+            + (current_summary if current_summary else "No previous summary.")
+            + "\n\n[NEW MESSAGES]:\n"
+            + recent_history
+        )
+
+        # 3. Generate summary using local LLM (orjson on both sides: the
+        # prompt carries the whole recent history, the response is multi-KB)
+        body = {
+            "model": config.llm_model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": 300,
+            "temperature": 0.3,  # Lower temp for consistent summaries
+        }
+        try:
+            new_summary = _stream_summary_completion(body)
+        except Exception:
+            # Endpoint may not support streaming - buffer the whole reply
+            response = _llm_http.post(
+                f"{config.llm_base_url}/chat/completions",
+                content=orjson.dumps(body),
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            new_summary = data["choices"][0]["message"]["content"].strip()
+
+        if not new_summary:
+            return  # Never overwrite the summary with empty output
+
+        # 4. Save updated summary and advance the high-water mark
+        if len(_FOLD_CACHE) >= _FOLD_CACHE_MAX:
+            _FOLD_CACHE.pop(next(iter(_FOLD_CACHE)))
+        _FOLD_CACHE[chat_id] = (fold_key, new_summary)
+        db.update_summary(chat_id, new_summary, last_id)
+        print(f"✓ Background summary updated for chat {chat_id[:8]}...")
         
-        # 2. Build prompt with strict token budget
-        prompt = f"""You are a Memory Manager. Update the conversation summary based on new messages.
+    except Exception as e:
+        print(f"⚠ Background summarization failed: {e}")
+
+
+_CHAT_MARKER_RE = re.compile(r"<<<([^>]+)>>>")
 
-[OLD SUMMARY]:
-{current_summary if current_summary else "No previous summary."}
 
-[NEW MESSAGES]:
-{recent_history}
+def summarize_chats_background(chat_ids: list[str]) -> None:
+    """
+    Fold several chats in a single LLM request - useful when a backlog
+    of summaries rolls up at once (e.g. after a restart). One prompt
+    with sentinel-delimited sections amortizes the network round trip
+    and prompt prefill across chats instead of paying them per chat.
 
-Instructions:
-- Output a concise paragraph (max 150 words) capturing the key context
-- Include important facts, preferences, and ongoing topics
-- Do NOT output a conversational response
-- Just output the summary text, nothing else"""
+    Args:
+        chat_ids: The chat IDs to summarize
+    """
+    try:
+        # 1. Gather per-chat state; skip chats with nothing new
+        jobs = []  # (chat_id, current_summary, recent_history, last_id)
+        for chat_id in chat_ids:
+            current_summary, last_seen = db.get_summary_state(chat_id)
+            recent_history, last_id = db.get_new_messages_text(chat_id, last_seen)
+            if recent_history:
+                jobs.append((chat_id, current_summary, recent_history, last_id))
+
+        if not jobs:
+            return
+        if len(jobs) == 1:
+            summarize_chat_background(jobs[0][0])
+            return
+
+        # 2. One delimited prompt covering every chat
+        sections = []
+        for chat_id, current_summary, recent_history, _ in jobs:
+            sections.append(
+                f"<<<{chat_id}>>>\n"
+                f"[OLD SUMMARY]:\n{current_summary if current_summary else 'No previous summary.'}\n\n"
+                f"[NEW MESSAGES]:\n{recent_history}"
+            )
+
+        prompt = (
+            "You are a Memory Manager. For EACH chat below, update its conversation "
+            "summary based on the new messages.\n\n"
+            "Instructions:\n"
+            "- For every chat, first repeat its marker line exactly as given "
+            "(<<<CHAT_ID>>>), then output a concise paragraph (max 150 words)\n"
+            "- Include important facts, preferences, and ongoing topics\n"
+            "- Do NOT output a conversational response\n"
+            "- Output nothing besides the markers and summaries\n\n" + "\n\n".join(sections)
+        )
 
-        # 3. Generate summary using local LLM
-        response = httpx.post(
+        response = _llm_http.post(
             f"{config.llm_base_url}/chat/completions",
-            json={
-                "model": config.llm_model_name,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 300,
-                "temperature": 0.3,  # Lower temp for consistent summaries
-            },
-            headers={"Authorization": f"Bearer {config.llm_api_key}"},
-            timeout=60.0,
+            content=orjson.dumps(
+                {
+                    "model": config.llm_model_name,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "max_tokens": 300 * len(jobs),
+                    "temperature": 0.3,
+                }
+            ),
+            headers={"Content-Type": "application/json"},
         )
         response.raise_for_status()
-        
-        data = response.json()
-        new_summary = data["choices"][0]["message"]["content"].strip()
-        
-        # 4. Save updated summary
-        db.update_summary(chat_id, new_summary)
-        print(f"✓ Background summary updated for chat {chat_id[:8]}...")
-        
+        content = orjson.loads(response.content)["choices"][0]["message"]["content"]
+
+        # 3. Split on the sentinel markers and save each chat's section
+        parts = _CHAT_MARKER_RE.split(content)
+        summaries = {
+            parts[i].strip(): parts[i + 1].strip()
+            for i in range(1, len(parts) - 1, 2)
+        }
+        updated = 0
+        for chat_id, _, _, last_id in jobs:
+            new_summary = summaries.get(chat_id)
+            if new_summary:
+                db.update_summary(chat_id, new_summary, last_id)
+                updated += 1
+        print(f"✓ Batch summary updated {updated}/{len(jobs)} chat(s)")
     except Exception as e:
-        print(f"⚠ Background summarization failed: {e}")
+        print(f"⚠ Batch summarization failed: {e}")
 
 
 def get_context_for_prompt(chat_id: str, user_id: str, query: str) -> dict:
     """
-    Build the 3-tier context for the LLM prompt.
-    
+    Build the 3-tier context for the LLM prompt. The three tiers hit
+    independent backends (SQLite twice, Qdrant once), so they are
+    fetched concurrently and the wall time is the slowest of the three.
+
     Returns:
         dict with keys: summary, facts, recent_messages
     """
     from tools.memory_tool import retrieve_context
-    
-    # Tier 3: Rolling Summary
-    summary = db.get_summary(chat_id) if chat_id else ""
-    
-    # Tier 2: Semantic Facts from Vector DB
-    facts = retrieve_context(query, user_id)
-    
-    # Tier 1: Recent Messages (last 10)
-    recent_messages = db.get_messages(chat_id, limit=10) if chat_id else []
-    
-    return {
-        "summary": summary,
-        "facts": facts,
-        "recent_messages": recent_messages,
-    }
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        # Tier 3: Rolling Summary / Tier 2: Semantic Facts / Tier 1: Recent
+        summary_f = pool.submit(db.get_summary, chat_id) if chat_id else None
+        facts_f = pool.submit(retrieve_context, query, user_id)
+        recent_f = (
+            pool.submit(db.get_messages, chat_id, limit=10) if chat_id else None
+        )
+
+        return {
+            "summary": summary_f.result() if summary_f else "",
+            "facts": facts_f.result(),
+            "recent_messages": recent_f.result() if recent_f else [],
+        }
@@ -5,10 +5,15 @@ Fixes stability issues by handling rate limits and HTTP errors gracefully.
 
 import asyncio
 import atexit
+import html
+import re
+import sys
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from ddgs import DDGS
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from config import config
+from tools.memory_tool import SemanticQueryCache, embed_query
 import time
 import random
 
@@ -29,54 +34,174 @@ def _cleanup_executor():
 # Register cleanup handler
 atexit.register(_cleanup_executor)
 
+# One DDGS session per worker thread: keeps the HTTP session (and its
+# TLS connections) alive across searches instead of a handshake per call,
+# without assuming DDGS is safe to share between threads
+_local = threading.local()
+
+
+def _ddgs() -> DDGS:
+    """Get this thread's reusable DDGS session, creating it on first use."""
+    ddgs = getattr(_local, "ddgs", None)
+    if ddgs is None:
+        ddgs = DDGS()
+        _local.ddgs = ddgs
+    return ddgs
+
+
+def _search_once(query: str, max_results: int = 5) -> list:
+    """One DDG attempt on this thread's session; raises on failure."""
+    try:
+        results = list(_ddgs().text(query, max_results=max_results))
+    except Exception:
+        # Session may be wedged (stale connection, rate-limit state);
+        # drop it so the next attempt starts from a fresh one
+        _local.__dict__.pop("ddgs", None)
+        raise
+    print(f"   📥 Got {len(results)} results")
+    return results
+
+
+def _retry_delay(attempt: int) -> float:
+    """Backoff before retry number `attempt` (1-based), with jitter."""
+    return RETRY_DELAY * (attempt + 1) + random.random()
+
 
 def _safe_search(query: str, max_results: int = 5) -> list:
     """Synchronous search with retry logic and error handling."""
-    last_error = None
-
     for attempt in range(MAX_RETRIES):
         try:
             # Add delay on retries to avoid rate limiting
             if attempt > 0:
-                delay = RETRY_DELAY * (attempt + 1) + random.random()
+                delay = _retry_delay(attempt)
                 print(
                     f"   ⏳ Retry {attempt + 1}/{MAX_RETRIES} after {delay:.1f}s delay..."
                 )
                 time.sleep(delay)
 
-            with DDGS() as ddgs:
-                results = list(ddgs.text(query, max_results=max_results))
-                print(f"   📥 Got {len(results)} results")
-                return results
+            return _search_once(query, max_results)
 
         except Exception as e:
             print(f"   ⚠ Search attempt {attempt + 1} failed: {e}")
-            last_error = e
 
     # All retries exhausted
     print(f"   ❌ All {MAX_RETRIES} retries failed for: {query}")
     return []
 
 
+# Bound concurrent searches without tying up executor threads: workers
+# are only occupied while a request is actually on the wire, never
+# during backoff sleeps
+_search_semaphore = asyncio.Semaphore(16)
+
+
+async def _safe_search_async(query: str, max_results: int = 5) -> list:
+    """Async retry wrapper: attempts run on the executor, backoff waits
+    on the event loop so retries don't idle a worker thread."""
+    async with _search_semaphore:
+        loop = asyncio.get_running_loop()
+        for attempt in range(MAX_RETRIES):
+            try:
+                if attempt > 0:
+                    delay = _retry_delay(attempt)
+                    print(
+                        f"   ⏳ Retry {attempt + 1}/{MAX_RETRIES} after {delay:.1f}s delay..."
+                    )
+                    await asyncio.sleep(delay)
+
+                return await loop.run_in_executor(
+                    _executor, _search_once, query, max_results
+                )
+
+            except Exception as e:
+                print(f"   ⚠ Search attempt {attempt + 1} failed: {e}")
+
+    print(f"   ❌ All {MAX_RETRIES} retries failed for: {query}")
+    return []
+
+
+# Confidence heuristic thresholds for formatted results - used by the agent
+# to decide whether a search result can be answered from directly
+MIN_CONFIDENT_SOURCES = 2
+MIN_CONFIDENT_CHARS = 400
+
+
+def is_high_confidence(result_text: str) -> bool:
+    """
+    Check whether formatted search results look sufficient to answer from:
+    enough well-formed sources with substantial content.
+    """
+    if not result_text or len(result_text) < MIN_CONFIDENT_CHARS:
+        return False
+    return result_text.count("SOURCE ") >= MIN_CONFIDENT_SOURCES
+
+
+# Semantic cache over formatted results: paraphrased repeats ("France
+# capital" / "capital of France") skip the whole DDG round trip and its
+# retry/backoff loop. Short TTL keeps reasonably fresh answers; queries
+# that look time-sensitive bypass the cache entirely.
+_results_cache = SemanticQueryCache(max_entries=64, threshold=0.92, ttl_seconds=600.0)
+_CACHE_KEY = "web_search"
+
+
+def _cacheable(query: str) -> bool:
+    """Time-sensitive queries must never be served from cache."""
+    from semantic_cache import is_cacheable
+
+    return is_cacheable(query)
+
+
+def _cached_results(query: str) -> str | None:
+    """Return cached formatted results for a near-duplicate query."""
+    if not _cacheable(query):
+        return None
+    vec = embed_query(query)
+    if vec is None:
+        return None
+    hit = _results_cache.get(vec, _CACHE_KEY)
+    if hit is not None:
+        print("   ⚡ Semantic search cache hit")
+    return hit
+
+
+def _store_results(query: str, output: str) -> None:
+    """Cache formatted results for future paraphrases of this query."""
+    if not output or not _cacheable(query):
+        return
+    vec = embed_query(query)
+    if vec is not None:
+        _results_cache.put(vec, _CACHE_KEY, output)
+
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+# Interned separator shared by every formatted result block
+_SRC_SEP = sys.intern("\n---\n")
+
+
+def _clean_snippet(text: str) -> str:
+    """Strip markup tags, unescape entities, and collapse whitespace so
+    the 1000-char snippet budget carries information, not &amp; noise."""
+    return " ".join(html.unescape(_TAG_RE.sub(" ", text)).split())
+
+
 def _format_results(results: list) -> str:
     """Format search results for the LLM."""
     if not results:
         return ""
 
-    formatted = []
-    # Limit to top 4 results to prevent token explosion
-    for i, res in enumerate(results[:4], 1):
-        title = res.get("title", "No title")
-        # SAFE LIMIT: 1000 chars is plenty for context without exploding tokens
-        snippet = res.get("body", res.get("excerpt", "No content"))[:1000]
-        url = res.get("href", res.get("url", "#"))
-        formatted.append(f"SOURCE {i}: {title}\nURL: {url}\nCONTENT: {snippet}\n")
+    # Limit to top 4 results to prevent token explosion; 1000 chars of
+    # snippet is plenty for context. One comprehension + one join keeps
+    # the per-result work to a single f-string.
+    return _SRC_SEP.join(
+        f"SOURCE {i}: {res.get('title') or 'No title'}\n"
+        f"URL: {res.get('href') or res.get('url') or '#'}\n"
+        f"CONTENT: {_clean_snippet(res.get('body') or res.get('excerpt') or 'No content')[:1000]}\n"
+        for i, res in enumerate(results[:4], 1)
+    )
 
-    return "\n---\n".join(formatted)
 
-
-@tool
-def web_search(query: str) -> str:
+def _web_search(query: str) -> str:
     """
     Search the web for current information.
     Useful for news, facts, current events, or specific data not in your memory.
@@ -94,6 +219,10 @@ def web_search(query: str) -> str:
         return "Web search is disabled via config."
 
     try:
+        cached = _cached_results(query)
+        if cached is not None:
+            return cached
+
         # Perform search with retries
         results = _safe_search(query)
 
@@ -101,6 +230,7 @@ def web_search(query: str) -> str:
             return f"No results found for: {query}. Try rephrasing your query."
 
         output = _format_results(results)
+        _store_results(query, output)
         print(f"   ✅ Returning {len(output)} chars from {len(results)} sources")
         return output
 
@@ -109,7 +239,8 @@ def web_search(query: str) -> str:
         return f"Error performing web search: {str(e)}"
 
 
-# Async version for use in FastAPI endpoints (non-blocking)
+# Async version: the agent's ainvoke path dispatches this coroutine, so
+# retries back off on the event loop instead of blocking an executor thread
 async def web_search_async(query: str) -> str:
     """
     Async web search - runs blocking I/O in a thread pool.
@@ -122,17 +253,34 @@ async def web_search_async(query: str) -> str:
 
     try:
         loop = asyncio.get_running_loop()
-        results = await loop.run_in_executor(_executor, _safe_search, query)
+
+        # Cache probe embeds over HTTP - keep it off the event loop too
+        cached = await loop.run_in_executor(_executor, _cached_results, query)
+        if cached is not None:
+            return cached
+
+        results = await _safe_search_async(query)
 
         if not results:
             return f"No results found for: {query}. Try rephrasing your query."
 
-        return _format_results(results)
+        output = _format_results(results)
+        await loop.run_in_executor(_executor, _store_results, query, output)
+        return output
 
     except Exception as e:
         return f"Error performing web search: {str(e)}"
 
 
+# Sync calls run _web_search; the agent's tool node uses ainvoke, which
+# dispatches web_search_async and keeps backoff sleeps off the executor
+web_search = StructuredTool.from_function(
+    func=_web_search,
+    coroutine=web_search_async,
+    name="web_search",
+)
+
+
 # Synchronous version for direct use (returns raw dicts)
 def search_web_sync(query: str) -> list[dict]:
     """
@@ -2,18 +2,23 @@
 Universal LLM Factory - Provider-agnostic LLM client.
 Works with any OpenAI-compatible endpoint (LM Studio, Ollama, vLLM, etc.)
 """
+from functools import lru_cache
+
 from langchain_openai import ChatOpenAI
 from config import config
 
 
+@lru_cache(maxsize=4)
 def get_llm(streaming: bool = True, temperature: float = 0.7) -> ChatOpenAI:
     """
-    Create a ChatOpenAI instance configured for the local LLM server.
-    
+    Get a ChatOpenAI instance configured for the local LLM server.
+    Memoized per (streaming, temperature) so hot paths reuse the same
+    client (and its HTTP session) instead of rebuilding one per request.
+
     Args:
         streaming: Enable token-by-token streaming (default: True)
         temperature: Sampling temperature (default: 0.7)
-    
+
     Returns:
         Configured ChatOpenAI instance
     """
@@ -26,9 +31,10 @@ def get_llm(streaming: bool = True, temperature: float = 0.7) -> ChatOpenAI:
     )
 
 
+@lru_cache(maxsize=4)
 def get_llm_for_tools(temperature: float = 0.0) -> ChatOpenAI:
     """
-    Create a ChatOpenAI instance optimized for tool calling.
+    Get a ChatOpenAI instance optimized for tool calling (memoized).
     Uses lower temperature for more deterministic tool selection.
     """
     return ChatOpenAI(
@@ -0,0 +1,66 @@
+"""
+Token Budget - Bound prompt sections to a fixed token budget.
+Prefill latency scales with prompt tokens, so volatile context tiers are
+clipped to a budget before injection instead of growing with chat length.
+"""
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character heuristic
+    tiktoken = None
+
+# Rough chars-per-token ratio used when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Get a tokenizer (cl100k_base approximates the local model closely)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text, approximating by characters if needed."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // _CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "tail") -> str:
+    """
+    Clip text to at most max_tokens.
+
+    Args:
+        text: The text to clip
+        max_tokens: Token budget (<= 0 disables truncation)
+        keep: "tail" keeps the newest/last portion (for chronological
+              history), "head" keeps the beginning
+
+    Returns:
+        The original text if it fits, otherwise the clipped portion
+    """
+    if not text or max_tokens <= 0:
+        return text
+
+    encoding = _get_encoding()
+    if encoding is None:
+        max_chars = max_tokens * _CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return text[-max_chars:] if keep == "tail" else text[:max_chars]
+
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+
+    clipped = tokens[-max_tokens:] if keep == "tail" else tokens[:max_tokens]
+    return encoding.decode(clipped)